@@ -1,27 +1,204 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory
+from werkzeug.exceptions import HTTPException
+from werkzeug.security import safe_join
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from openpyxl.xml import LXML
+import orjson
+import atexit
+import logging
 import os
+import secrets
+import stat
 import time
-import traceback
-import json
+import decimal
+import copy
+import hashlib
+import uuid
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .ocr_service import extract_text_from_file
-from .extraction import extract_financial_data, load_extracted_data, normalize_extracted_data
+from .extraction import extract_financial_data, load_extracted_data, normalize_extracted_data, save_extracted_data
 from .report_generator import generate_csv_report, generate_excel_report
+from . import store
+
+# orjson encodes jsonify() responses in C; sorted keys match Flask's default output
+ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+def _orjson_default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class ORJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype="application/json")
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
 app = Flask(__name__, static_folder='../')
+app.json = ORJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 200)) * 1024 * 1024
 CORS(app)
 
+# openpyxl silently falls back to the pure-Python XML reader/writer without lxml
+if not LXML:
+    app.logger.warning("⚠️ lxml not installed; Excel reports will use openpyxl's slower pure-Python XML path")
+
+@app.errorhandler(Exception)
+def handle_exception(e):
+    """Single JSON 500 for uncaught handler errors; HTTP errors (404, 413, ...) pass through"""
+    if isinstance(e, HTTPException):
+        return e
+    app.logger.exception(e)
+    return jsonify({"success": False, "message": str(e)}), 500
+
 # Mock Database
+# In-process view of the SQLite store; every write goes through store.py too.
+# Pipeline threads update these maps while request threads read them, so mutations
+# (and the list-endpoint snapshots) happen under _STATE_LOCK; store.py has its own lock.
 DEALS = {}
 DOCUMENTS = {}
+DOCS_BY_DEAL = {}  # deal_id -> [document], in insertion order
+_UNLOADED_DOCS = set()  # ids of documents hydrated without extracted_data (see _materialize)
+_STATE_LOCK = threading.Lock()
+
+# Encoded list payloads for GET /api/deals and /api/documents.
+# Every mutation bumps the generation, so a cached (gen, bytes) pair is stale once gens differ.
+_LIST_GEN = {'deals': 0, 'documents': 0}
+_LIST_PAYLOADS = {}
+
+def _save_deal(deal):
+    with _STATE_LOCK:
+        DEALS[deal["id"]] = deal
+        _LIST_GEN['deals'] += 1
+    store.save_deal(deal)
+
+def _set_deal_status(deal_id, status):
+    with _STATE_LOCK:
+        DEALS[deal_id]["status"] = status
+        _LIST_GEN['deals'] += 1
+    store.update_deal_status(deal_id, status)
+
+def _add_document(doc):
+    with _STATE_LOCK:
+        DOCUMENTS[doc["id"]] = doc
+        DOCS_BY_DEAL.setdefault(doc["deal_id"], []).append(doc)
+        _LIST_GEN['documents'] += 1
+    store.save_document(doc)
+
+def _materialize(doc):
+    """Fills in a startup stub's extracted_data from the store on first use"""
+    with _STATE_LOCK:
+        unloaded = doc["id"] in _UNLOADED_DOCS
+    if unloaded:
+        # Read outside the lock; if two threads race, both load the same blob
+        data = store.load_document_data(doc["id"])
+        with _STATE_LOCK:
+            if doc["id"] in _UNLOADED_DOCS:
+                doc["extracted_data"] = data
+                _UNLOADED_DOCS.discard(doc["id"])
+    return doc
+
+def _snapshot(items):
+    """list(items()) taken under _STATE_LOCK, safe to iterate while other threads mutate"""
+    with _STATE_LOCK:
+        return list(items())
+
+def _list_response(key, build):
+    """Serve the encoded payload for a list endpoint, re-encoding only after a mutation"""
+    # Read before build(): a mutation during the build leaves the entry stale, never wrong-and-current
+    gen = _LIST_GEN[key]
+    cached = _LIST_PAYLOADS.get(key)
+    if cached is None or cached[0] != gen:
+        cached = (gen, orjson.dumps(build(), default=_orjson_default, option=ORJSON_OPTIONS))
+        _LIST_PAYLOADS[key] = cached
+    return Response(cached[1], mimetype='application/json')
+
+# Background Pipeline
+# OCR + extraction run off the request thread; uploads return a task id
+# that the frontend polls via /api/tasks/<task_id>.
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', 4))
+PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix='pipeline')
+TASKS = {}
+_TASKS_LOCK = threading.Lock()
+# Finished tasks are kept this long for pollers, then evicted on the next _new_task
+TASK_TTL_SECONDS = int(os.environ.get('TASK_TTL_SECONDS', 3600))
+_FINISHED_STATES = ("SUCCESS", "FAILURE")
+
+def _new_task(deal_id):
+    task_id = uuid.uuid4().hex
+    now = time.monotonic()
+    with _TASKS_LOCK:
+        expired = [
+            tid for tid, t in TASKS.items()
+            if t["finished_at"] is not None and now - t["finished_at"] > TASK_TTL_SECONDS
+        ]
+        for tid in expired:
+            del TASKS[tid]
+        TASKS[task_id] = {
+            "id": task_id,
+            "deal_id": deal_id,
+            "state": "PENDING",
+            "result": None,
+            "message": None,
+            "finished_at": None
+        }
+    return task_id
+
+def _update_task(task_id, **fields):
+    """Apply state changes to a task atomically; stamps finished_at on SUCCESS/FAILURE"""
+    with _TASKS_LOCK:
+        task = TASKS.get(task_id)
+        if task is None:
+            return
+        task.update(fields)
+        if fields.get("state") in _FINISHED_STATES:
+            task["finished_at"] = time.monotonic()
+
+# Fire-and-forget disk writes (OCR text copies); drained on interpreter exit
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='io')
+atexit.register(_IO_POOL.shutdown)
+
+def _write_text(path, text):
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        app.logger.info("OCR text saved to: %s", path)
+    except OSError as e:
+        app.logger.warning("⚠️ Failed to save OCR text to %s: %s", path, e)
 
-# Ensure directories exist
-EXTRACTED_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extracted_data')
+# Formatted /api/analysis payloads: deal_id -> (extracted_data, deal_value, bytes)
+_ANALYSIS_CACHE = {}
+
+# Ensure directories exist (once, at import)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EXTRACTED_DATA_DIR = os.path.join(BASE_DIR, 'extracted_data')
 os.makedirs(EXTRACTED_DATA_DIR, exist_ok=True)
 
-REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
+REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+PARSED_TEXT_DIR = os.path.join(BASE_DIR, 'parsed_text')
+os.makedirs(PARSED_TEXT_DIR, exist_ok=True)
+
+# OCR + extraction results keyed by upload content hash (see _upload_digest)
+UPLOAD_CACHE_DIR = os.path.join(BASE_DIR, 'upload_cache')
+os.makedirs(UPLOAD_CACHE_DIR, exist_ok=True)
+
 # Serve Static Files
 @app.route('/')
 def index():
@@ -33,55 +210,77 @@ def serve_static(path):
 
 # --- Persistence Recovery ---
 def load_existing_deals():
-    """Scans extracted_data directory and repopulates DEALS/DOCUMENTS"""
+    """Repopulates DEALS/DOCUMENTS from the SQLite store"""
+    if store.is_empty():
+        import_extracted_data_dir()
+
+    deals = store.list_deals()
+    # Documents start as stubs; each blob is decoded when its deal is first requested
+    docs = store.list_documents(with_data=False)
+    with _STATE_LOCK:
+        for deal in deals:
+            DEALS[deal["id"]] = deal
+        for doc in docs:
+            DOCUMENTS[doc["id"]] = doc
+            DOCS_BY_DEAL.setdefault(doc["deal_id"], []).append(doc)
+            _UNLOADED_DOCS.add(doc["id"])
+        _LIST_GEN['deals'] += 1
+        _LIST_GEN['documents'] += 1
+    app.logger.info("Loaded %s deals / %s documents from %s", len(DEALS), len(DOCUMENTS), store.DB_PATH)
+
+def import_extracted_data_dir():
+    """Scans extracted_data directory once and writes the recovered deals into the store"""
     if not os.path.exists(EXTRACTED_DATA_DIR):
         return
 
-    print(f"Scanning for existing deals in: {EXTRACTED_DATA_DIR}")
-    for filename in os.listdir(EXTRACTED_DATA_DIR):
-        if filename.endswith('.json'):
-            try:
-                deal_id = filename.replace('.json', '')
-                filepath = os.path.join(EXTRACTED_DATA_DIR, filename)
-                extracted_data = load_extracted_data(deal_id)
-                if not extracted_data:
-                    continue
-                
-                # Reconstruct deal info
-                company_name = extracted_data.get('company_name') or f"Deal {deal_id}"
-                deal_value = extracted_data.get('market_intelligence', {}).get('market_size') or "N/A"
-                
-                # Populate DEALS
-                # Improved filename recovery logic
-                file_name = f"{deal_id}.pdf"
-                if deal_id.startswith('upload_'):
-                    parts = deal_id.split('_')
-                    if len(parts) >= 3:
-                        # Reconstruct filename: upload_FILENAME_TIMESTAMP
-                        file_name = "_".join(parts[1:-1])
-
-                DEALS[deal_id] = {
-                    "id": deal_id,
-                    "name": company_name,
-                    "value": deal_value,
-                    "status": "Active",
-                    "date": time.strftime("%Y-%m-%d", time.localtime(os.path.getmtime(filepath))),
-                    "file_name": file_name
-                }
-                
-                # Populate DOCUMENTS (Mock)
-                doc_id = f"doc_{deal_id}"
-                DOCUMENTS[doc_id] = {
-                    "id": doc_id,
-                    "deal_id": deal_id,
-                    "name": f"{deal_id}.pdf",
-                    "extracted_data": extracted_data,
-                    "ocr_text_preview": "Loaded from disk..."
-                }
-                print(f"Recovered deal: {deal_id} ({company_name})")
-                
-            except Exception as e:
-                print(f"Failed to load deal from {filename}: {e}")
+    app.logger.info("Scanning for existing deals in: %s", EXTRACTED_DATA_DIR)
+    with os.scandir(EXTRACTED_DATA_DIR) as it:
+        entries = [(e.name, e.path, e.stat().st_mtime) for e in it if e.name.endswith('.json') and 'ERROR' not in e.name]
+
+    for filename, filepath, mtime in entries:
+        try:
+            deal_id = filename.replace('.json', '')
+            # Parse this file directly; load_extracted_data(deal_id) would re-list the directory per file
+            with open(filepath, 'rb') as f:
+                extracted_data = normalize_extracted_data(orjson.loads(f.read()))
+            if not extracted_data:
+                continue
+            
+            # Reconstruct deal info
+            company_name = extracted_data.get('company_name') or f"Deal {deal_id}"
+            deal_value = extracted_data.get('market_intelligence', {}).get('market_size') or "N/A"
+            
+            # Populate DEALS
+            # Improved filename recovery logic
+            file_name = f"{deal_id}.pdf"
+            if deal_id.startswith('upload_'):
+                parts = deal_id.split('_')
+                if len(parts) >= 3:
+                    # Reconstruct filename: upload_FILENAME_TIMESTAMP
+                    file_name = "_".join(parts[1:-1])
+
+            store.save_deal({
+                "id": deal_id,
+                "name": company_name,
+                "value": deal_value,
+                "status": "Active",
+                "date": time.strftime("%Y-%m-%d", time.localtime(mtime)),
+                "file_name": file_name
+            })
+            
+            # Populate DOCUMENTS (Mock)
+            doc_id = f"doc_{deal_id}"
+            store.save_document({
+                "id": doc_id,
+                "deal_id": deal_id,
+                "name": f"{deal_id}.pdf",
+                "extracted_data": extracted_data,
+                "ocr_text_preview": "Loaded from disk..."
+            })
+            app.logger.info("Recovered deal: %s (%s)", deal_id, company_name)
+            
+        except Exception as e:
+            app.logger.warning("Failed to load deal from %s: %s", filename, e)
 
 # Load deals on startup
 load_existing_deals()
@@ -93,32 +292,125 @@ def handle_deals():
     if request.method == 'POST':
         data = request.json
         deal_id = str(len(DEALS) + 1)
-        DEALS[deal_id] = {
+        _save_deal({
             "id": deal_id,
             "name": data.get('name', 'New Deal'),
             "status": "Active",
             "date": "2024-10-25"
-        }
+        })
         return jsonify({"success": True, "deal": DEALS[deal_id]})
-    return jsonify({"success": True, "deals": list(DEALS.values())})
+    return _list_response('deals', lambda: {"success": True, "deals": _snapshot(DEALS.values)})
+
+@app.route('/api/deals/<deal_id>/status', methods=['GET'])
+def get_deal_status(deal_id):
+    """Processing / Active / Failed, for clients tracking an upload by deal id instead of task id"""
+    deal = DEALS.get(deal_id)
+    if not deal:
+        return jsonify({"success": False, "message": "Deal not found"}), 404
+    return jsonify({"success": True, "dealId": deal_id, "status": deal.get("status")})
 
 @app.route('/api/documents', methods=['GET'])
 def list_documents():
     deal_id = request.args.get('dealId')
-    docs = [doc for doc in DOCUMENTS.values() if doc['deal_id'] == deal_id] if deal_id else list(DOCUMENTS.values())
+    # Materializing can hit SQLite, so it runs over a snapshot taken under the lock;
+    # pipeline threads may add documents meanwhile
+    if not deal_id:
+        return _list_response('documents', lambda: {
+            "success": True,
+            "data": [_materialize(d) for d in _snapshot(DOCUMENTS.values)]
+        })
     return jsonify({
         "success": True,
-        "data": docs
+        "data": [_materialize(d) for d in _snapshot(lambda: DOCS_BY_DEAL.get(deal_id, ()))]
     })
 
+# Frontend analysis layout: (output path, extracted_data path, default, default_if_falsy).
+# A None input path means the default is a constant.
+_ANALYSIS_PATHS = (
+    (("header", "companyName"), ("company_name",), None, False),
+    (("header", "currency"), ("currency",), "USD", False),
+    (("header", "dealValue", "description"), None, "Deal Value", False),
+    (("header", "dealValue", "visible"), None, True, False),
+    (("header", "marketSize", "description"), None, "Market Size", False),
+    (("header", "marketSize", "display"), ("market_intelligence", "market_size"), "N/A", True),
+    (("header", "marketSize", "visible"), None, True, False),
+    (("summary", "text"), ("company_summary", "text"), "", False),
+    (("summary", "visible"), None, True, False),
+    (("revenue", "present", "value"), ("revenue", "present", "value"), "N/A", False),
+    (("revenue", "present", "period"), ("revenue", "present", "period"), "N/A", False),
+    (("revenue", "history"), ("revenue", "history"), [], False),
+    (("revenue", "future"), ("revenue", "future"), [], False),
+    (("revenue", "visible"), None, True, False),
+    (("profitMetrics",), ("profit_metrics",), {}, False),
+    (("marketIntelligence", "industryPosition"), ("market_intelligence", "industry_position"), None, False),
+    (("marketIntelligence", "marketSharePercent"), ("market_intelligence", "market_share_percent"), None, False),
+    (("marketIntelligence", "competitors"), ("market_intelligence", "key_competitors"), [], False),
+    (("marketIntelligence", "context"), ("market_intelligence", "source_context"), None, False),
+    (("marketIntelligence", "visible"), None, True, False),
+    (("riskAnalysis", "operational"), ("risk_analysis", "operational_risks"), [], False),
+    (("riskAnalysis", "financial"), ("risk_analysis", "financial_risks"), [], False),
+    (("riskAnalysis", "market"), ("risk_analysis", "market_risks"), [], False),
+    (("riskAnalysis", "regulatory"), ("risk_analysis", "regulatory_risks"), [], False),
+    (("riskAnalysis", "visible"), None, True, False),
+    (("aiSuggestion", "recommendation"), ("ai_suggestion", "recommendation"), None, False),
+    (("aiSuggestion", "confidence"), ("ai_suggestion", "confidence_percent"), None, False),
+    (("aiSuggestion", "rationale"), ("ai_suggestion", "rationale"), None, False),
+    (("aiSuggestion", "visible"), None, True, False),
+    (("tale_of_the_tape",), ("tale_of_the_tape",), {}, False),
+    (("free_cash_flow",), ("free_cash_flow",), {}, False),
+)
+
+def _walk(d, path, default):
+    """d[path[0]][path[1]]..., or default when a key is missing or a level is not a dict"""
+    for k in path:
+        if not isinstance(d, dict) or k not in d:
+            return default
+        d = d[k]
+    return d
+
+# _ANALYSIS_PATHS split once into (output parent, output key, section, path within section, ...)
+_ANALYSIS_PLAN = tuple(
+    (out_path[:-1], out_path[-1], in_path[0] if in_path else None, in_path[1:] if in_path else (), default, default_if_falsy)
+    for out_path, in_path, default, default_if_falsy in _ANALYSIS_PATHS
+)
+_MISSING = object()
+
+def _build_analysis_data(extracted_data):
+    """Map the backend schema to the frontend structure in one pass over _ANALYSIS_PLAN"""
+    analysis_data = {}
+    # Each top-level section and output parent is looked up once, not once per field
+    sections = {}
+    parents = {(): analysis_data}
+    for out_parent, out_key, section, rest, default, default_if_falsy in _ANALYSIS_PLAN:
+        if section is None:
+            value = default
+        else:
+            sub = sections.get(section, _MISSING)
+            if sub is _MISSING:
+                sub = sections[section] = extracted_data.get(section, _MISSING)
+            if sub is _MISSING:
+                value = default
+            else:
+                value = _walk(sub, rest, default) if rest else sub
+        if default_if_falsy and not value:
+            value = default
+        node = parents.get(out_parent)
+        if node is None:
+            node = analysis_data
+            for k in out_parent:
+                node = node.setdefault(k, {})
+            parents[out_parent] = node
+        node[out_key] = value
+    return analysis_data
+
 @app.route('/api/analysis/<deal_id>', methods=['GET'])
 def get_analysis(deal_id):
     extracted_data = None
     
     # 1. Try to find in memory first
-    deal_docs = [doc for doc in DOCUMENTS.values() if doc['deal_id'] == deal_id]
+    deal_docs = DOCS_BY_DEAL.get(deal_id)
     if deal_docs:
-        extracted_data = deal_docs[-1]['extracted_data']
+        extracted_data = _materialize(deal_docs[-1])['extracted_data']
     
     # 2. If not in memory, try to load from disk
     if not extracted_data:
@@ -131,76 +423,34 @@ def get_analysis(deal_id):
             "data": {}
         })
 
+    # Retrieve user deal value from DEALS dictionary
+    user_deal_value = "N/A"
+    if deal_id in DEALS:
+        user_deal_value = DEALS[deal_id].get("value", "N/A")
+
+    # Serve the cached payload while the same extracted_data object is current
+    cached = _ANALYSIS_CACHE.get(deal_id)
+    if cached and cached[0] is extracted_data and cached[1] == user_deal_value:
+        return Response(cached[2], mimetype='application/json')
+
+    source_data = extracted_data
     extracted_data = normalize_extracted_data(extracted_data)
     
     # Format for frontend
     # Map the backend schema to the frontend expected structure
     # Frontend expects: header, revenue, profitMetrics, marketIntelligence, riskAnalysis, aiSuggestion
-    
-    # Retrieve user deal value from DEALS dictionary
-    user_deal_value = "N/A"
-    if deal_id in DEALS:
-        user_deal_value = DEALS[deal_id].get("value", "N/A")
 
-    analysis_data = {
-        "header": {
-            "companyName": extracted_data.get('company_name'),
-            "currency": extracted_data.get('currency', 'USD'),
-            "dealValue": {
-                "description": "Deal Value",
-                "display": user_deal_value,
-                "visible": True
-            },
-            "marketSize": {
-                "description": "Market Size",
-                "display": extracted_data.get('market_intelligence', {}).get('market_size') or "N/A",
-                "visible": True
-            }
-        },
-        "summary": {
-            "text": extracted_data.get('company_summary', {}).get('text', ''),
-            "visible": True
-        },
-        "revenue": {
-            "present": {
-                "value": extracted_data.get('revenue', {}).get('present', {}).get('value', 'N/A'),
-                "period": extracted_data.get('revenue', {}).get('present', {}).get('period', 'N/A')
-            },
-            "history": extracted_data.get('revenue', {}).get('history', []),
-            "future": extracted_data.get('revenue', {}).get('future', []),
-            "visible": True
-        },
-        "profitMetrics": extracted_data.get('profit_metrics', {}),
-        "marketIntelligence": {
-            "industryPosition": extracted_data.get('market_intelligence', {}).get('industry_position'),
-            "marketSharePercent": extracted_data.get('market_intelligence', {}).get('market_share_percent'),
-            "competitors": extracted_data.get('market_intelligence', {}).get('key_competitors', []),
-            "context": extracted_data.get('market_intelligence', {}).get('source_context'),
-            "visible": True
-        },
-        "riskAnalysis": {
-            "operational": extracted_data.get('risk_analysis', {}).get('operational_risks', []),
-            "financial": extracted_data.get('risk_analysis', {}).get('financial_risks', []),
-            "market": extracted_data.get('risk_analysis', {}).get('market_risks', []),
-            "regulatory": extracted_data.get('risk_analysis', {}).get('regulatory_risks', []),
-            "visible": True
-        },
-        "aiSuggestion": {
-            "recommendation": extracted_data.get('ai_suggestion', {}).get('recommendation'),
-            "confidence": extracted_data.get('ai_suggestion', {}).get('confidence_percent'),
-            "rationale": extracted_data.get('ai_suggestion', {}).get('rationale'),
-            "visible": True
-        },
-        "tale_of_the_tape": extracted_data.get('tale_of_the_tape', {}),
-        "free_cash_flow": extracted_data.get('free_cash_flow', {})
-    }
+    analysis_data = _build_analysis_data(extracted_data)
+    analysis_data["header"]["dealValue"]["display"] = user_deal_value
 
-    return jsonify({
+    payload = orjson.dumps({
         "success": True,
         "data": analysis_data
-    })
+    }, default=_orjson_default, option=ORJSON_OPTIONS)
+    _ANALYSIS_CACHE[deal_id] = (source_data, user_deal_value, payload)
+
+    return Response(payload, mimetype='application/json')
 
-@app.route('/api/extract', methods=['POST'])
 @app.route('/api/documents/upload', methods=['POST'])
 def process_document():
     deal_id = request.form.get('dealId') # Frontend sends dealId in FormData
@@ -221,70 +471,159 @@ def process_document():
     if file.filename == '':
         return jsonify({"success": False, "message": "No selected file"}), 400
     
+    # One clock read for the deal id, OCR filename and document id
+    now = int(time.time())
+
+    # Generate deal_id if not provided
+    if not deal_id:
+        deal_id = f"deal_{now}_{secrets.randbits(32):08x}"
+
+    # Register/Update Deal in Mock DB
+    _save_deal({
+        "id": deal_id,
+        "name": deal_name if deal_name else f"Deal {deal_id}",
+        "value": deal_value if deal_value else "N/A",
+        "status": "Processing",
+        "date": time.strftime("%Y-%m-%d"),
+        "file_name": file.filename
+    })
+
+    # Spool the upload to disk; the pipeline maps it instead of holding a copy in RAM
+    mime_type = file.mimetype or 'application/pdf'
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1])
+    tmp.close()
+    file.save(tmp.name)
+
+    task_id = _new_task(deal_id)
+    PIPELINE_EXECUTOR.submit(_run_document_pipeline, task_id, tmp.name, mime_type, deal_id, file.filename, deal_value, now)
+
+    return jsonify({
+        "success": True,
+        "taskId": task_id,
+        "dealId": deal_id,
+        "status": "processing"
+    }), 202
+
+# Legacy alias for the upload endpoint
+app.add_url_rule('/api/extract', endpoint='process_document', view_func=process_document, methods=['POST'])
+
+def _upload_digest(upload_path, deal_value):
+    """BLAKE2b of the upload bytes plus the deal value (which is part of the extraction prompt)"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(upload_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    h.update(b'\0' + str(deal_value or '').encode('utf-8'))
+    return h.hexdigest()
+
+def _load_cached_upload(digest):
     try:
-        # Generate deal_id if not provided
-        if not deal_id:
-            deal_id = f"deal_{int(time.time())}_{int(os.urandom(4).hex(), 16)}"
-            
-        # Register/Update Deal in Mock DB
-        DEALS[deal_id] = {
-            "id": deal_id,
-            "name": deal_name if deal_name else f"Deal {deal_id}",
-            "value": deal_value if deal_value else "N/A",
-            "status": "Processing",
-            "date": time.strftime("%Y-%m-%d"),
-            "file_name": file.filename
-        }
-        
-        # 1. OCR Extraction
-        file_content = file.read()
-        mime_type = file.mimetype or 'application/pdf'
-        print(f"Processing file: {file.filename} ({mime_type}) for Deal: {deal_id}")
-        
-        ocr_text = extract_text_from_file(file_content, mime_type)
-        print("OCR complete. Text length:", len(ocr_text))
+        with open(os.path.join(UPLOAD_CACHE_DIR, f"{digest}.json"), 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
 
-        # Save OCR text to backend/parsed_text
-        parsed_text_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsed_text')
-        os.makedirs(parsed_text_dir, exist_ok=True)
-        
-        ocr_filename = f"{int(time.time())}_{file.filename}.txt"
-        ocr_filepath = os.path.join(parsed_text_dir, ocr_filename)
-        
-        with open(ocr_filepath, 'w', encoding='utf-8') as f:
-            f.write(ocr_text)
-        print(f"OCR text saved to: {ocr_filepath}")
-        
-        # 2. Financial Data Extraction
+def _save_cached_upload(digest, ocr_text, extracted_data):
+    path = os.path.join(UPLOAD_CACHE_DIR, f"{digest}.json")
+    tmp_path = None
+    try:
+        # Unique temp name per call: concurrent identical uploads must not share one
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_CACHE_DIR, prefix=f"{digest}.", suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps({"ocr_text": ocr_text, "extracted_data": extracted_data}, option=orjson.OPT_NON_STR_KEYS))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        app.logger.warning("⚠️ Failed to cache upload %s: %s", digest, e)
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _run_document_pipeline(task_id, upload_path, mime_type, deal_id, filename, deal_value, now):
+    """Runs OCR -> save -> extract -> DOCUMENTS update for one upload (executor thread)"""
+    _update_task(task_id, state="STARTED")
+    try:
         # Use deal_id from request if available, otherwise construct one
-        extraction_deal_id = deal_id if deal_id else f"upload_{file.filename}"
-        extracted_data = extract_financial_data(ocr_text, deal_id=extraction_deal_id, user_deal_value=deal_value)
+        extraction_deal_id = deal_id if deal_id else f"upload_{filename}"
+
+        # Identical re-uploads reuse the earlier OCR + extraction result
+        digest = _upload_digest(upload_path, deal_value)
+        cached = _load_cached_upload(digest)
+
+        if cached:
+            app.logger.info("Upload cache hit for %s (%s); skipping OCR + extraction", filename, digest)
+            ocr_text = cached["ocr_text"]
+            extracted_data = cached["extracted_data"]
+            save_extracted_data(extraction_deal_id, extracted_data)
+        else:
+            # 1. OCR Extraction
+            app.logger.info("Processing file: %s (%s) for Deal: %s", filename, mime_type, deal_id)
+            
+            ocr_text = extract_text_from_file(upload_path, mime_type)
+            app.logger.info("OCR complete. Text length: %s", len(ocr_text))
+
+            # Save OCR text to backend/parsed_text
+            ocr_filename = f"{now}_{filename}.txt"
+            ocr_filepath = os.path.join(PARSED_TEXT_DIR, ocr_filename)
+            
+            _IO_POOL.submit(_write_text, ocr_filepath, ocr_text)
+            
+            # 2. Financial Data Extraction
+            extracted_data = extract_financial_data(ocr_text, deal_id=extraction_deal_id, user_deal_value=deal_value)
+            _save_cached_upload(digest, ocr_text, extracted_data)
         
         # Store result (Mock)
-        doc_id = f"doc_{int(time.time())}_{file.filename}"
-        DOCUMENTS[doc_id] = {
+        doc_id = f"doc_{now}_{filename}"
+        _add_document({
             "id": doc_id,
             "deal_id": extraction_deal_id,
-            "name": file.filename,
+            "name": filename,
             "extracted_data": extracted_data,
             "ocr_text_preview": ocr_text[:500]
-        }
+        })
+        _ANALYSIS_CACHE.pop(extraction_deal_id, None)
         
         # Update Deal Status
         if extraction_deal_id in DEALS:
-            DEALS[extraction_deal_id]["status"] = "Active"
+            _set_deal_status(extraction_deal_id, "Active")
 
-        return jsonify({
-            "success": True,
+        _update_task(task_id, state="SUCCESS", result={
             "dealId": extraction_deal_id,
             "data": extracted_data,
             "ocr_text_preview": ocr_text[:500]
         })
         
     except Exception as e:
-        print(f"Error processing document: {e}")
-        traceback.print_exc()
-        return jsonify({"success": False, "message": str(e)}), 500
+        app.logger.exception("Error processing document: %s", e)
+        if deal_id in DEALS:
+            _set_deal_status(deal_id, "Failed")
+        _update_task(task_id, state="FAILURE", message=str(e))
+    finally:
+        try:
+            os.unlink(upload_path)
+        except OSError:
+            pass
+
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task_status(task_id):
+    with _TASKS_LOCK:
+        task = TASKS.get(task_id)
+        task = dict(task) if task else None
+    if not task:
+        return jsonify({"success": False, "message": "Task not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "taskId": task_id,
+        "dealId": task["deal_id"],
+        "state": task["state"],
+        "result": task["result"],
+        "message": task["message"]
+    })
+
+# Report tasks share the task table; expose them under the reports namespace too
+app.add_url_rule('/api/reports/status/<task_id>', endpoint='get_task_status', view_func=get_task_status, methods=['GET'])
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -294,84 +633,129 @@ def health_check():
 
 @app.route('/api/reports/generate/<deal_id>', methods=['POST'])
 def generate_report(deal_id):
-    try:
-        # 1. Load data
-        extracted_data = load_extracted_data(deal_id)
-        if not extracted_data:
-            return jsonify({"success": False, "message": "Deal data not found"}), 404
-            
-        # 2. Get deal name
-        deal_name = DEALS.get(deal_id, {}).get('name', f'Deal_{deal_id}')
-        
-        # 3. Generate CSV
-        filename = generate_csv_report(deal_id, deal_name, extracted_data)
-        
-        return jsonify({
-            "success": True,
-            "filename": filename,
-            "message": "Report generated successfully"
-        })
-        
-    except Exception as e:
-        print(f"Report generation failed: {e}")
-        traceback.print_exc()
-        return jsonify({"success": False, "message": str(e)}), 500
+    # 1. Load data
+    extracted_data = load_extracted_data(deal_id)
+    if not extracted_data:
+        return jsonify({"success": False, "message": "Deal data not found"}), 404
+
+    # 2. Get deal name
+    deal_name = DEALS.get(deal_id, {}).get('name', f'Deal_{deal_id}')
+
+    # 3. Generate CSV in the background; the result carries the filename
+    task_id = _new_task(deal_id)
+    PIPELINE_EXECUTOR.submit(_run_report_task, task_id, generate_csv_report, deal_id, deal_name, extracted_data)
+
+    return jsonify({
+        "success": True,
+        "taskId": task_id,
+        "dealId": deal_id,
+        "status": "processing",
+        "message": "Report generation started"
+    }), 202
 
 
 @app.route('/api/reports/generate-excel/<deal_id>', methods=['POST'])
 def generate_excel(deal_id):
-    try:
-        extracted_data = load_extracted_data(deal_id)
-        if not extracted_data:
-            return jsonify({"success": False, "message": "Deal data not found"}), 404
+    extracted_data = load_extracted_data(deal_id)
+    if not extracted_data:
+        return jsonify({"success": False, "message": "Deal data not found"}), 404
 
-        deal_name = DEALS.get(deal_id, {}).get('name', f'Deal_{deal_id}')
-        filename = generate_excel_report(deal_id, deal_name, extracted_data)
+    deal_name = DEALS.get(deal_id, {}).get('name', f'Deal_{deal_id}')
+    task_id = _new_task(deal_id)
+    PIPELINE_EXECUTOR.submit(_run_report_task, task_id, generate_excel_report, deal_id, deal_name, extracted_data)
 
-        return jsonify({
-            "success": True,
-            "filename": filename,
-            "message": "Excel report generated successfully"
-        })
+    return jsonify({
+        "success": True,
+        "taskId": task_id,
+        "dealId": deal_id,
+        "status": "processing",
+        "message": "Excel report generation started"
+    }), 202
+
+def _run_report_task(task_id, generate, deal_id, deal_name, extracted_data):
+    """Runs one CSV/Excel report generator for a task (executor thread)"""
+    _update_task(task_id, state="STARTED")
+    try:
+        # extracted_data is load_extracted_data's shared cached dict; report writers may
+        # mutate what they are given (Excel fills in derived debt facilities), so pass a copy
+        filename = generate(deal_id, deal_name, copy.deepcopy(extracted_data))
+        _update_task(task_id, state="SUCCESS", result={"filename": filename})
     except Exception as e:
-        print(f"Excel report generation failed: {e}")
-        traceback.print_exc()
-        return jsonify({"success": False, "message": str(e)}), 500
+        app.logger.exception("Report generation failed: %s", e)
+        _update_task(task_id, state="FAILURE", message=str(e))
 
 @app.route('/api/reports/history/<deal_id>', methods=['GET'])
 def get_report_history(deal_id):
-    try:
-        if not os.path.exists(REPORTS_DIR):
-            return jsonify({"success": True, "reports": []})
-            
+    if not os.path.exists(REPORTS_DIR):
+        return jsonify({"success": True, "reports": []})
+
+    return jsonify({"success": True, "history": _reports_for_deal(deal_id)})
+
+# Report listing, rebuilt only when REPORTS_DIR changes (a new report bumps its mtime).
+# 'reports' is newest-first (stem, entry) pairs; 'by_deal' memoizes per-deal history until the next rebuild.
+# A rebuild swaps in a new dict rather than updating this one, so a request that read the old
+# index can only memoize its history into that old index, never into the fresh one.
+_REPORTS_INDEX = {'mtime': None, 'reports': [], 'by_deal': {}}
+
+def _report_stem(filename):
+    """'{deal_name}_{deal_id}' part of '{deal_name}_{deal_id}_{Analysis|Model}_{ts}.ext', else None"""
+    parts = filename.rsplit('_', 2)
+    if len(parts) == 3 and parts[1] in ('Analysis', 'Model'):
+        return parts[0]
+    return None
+
+def _reports_for_deal(deal_id):
+    global _REPORTS_INDEX
+    idx = _REPORTS_INDEX
+    mtime = os.stat(REPORTS_DIR).st_mtime_ns
+    if mtime != idx['mtime']:
         reports = []
-        for f in os.listdir(REPORTS_DIR):
-            if deal_id in f and f.lower().endswith(('.csv', '.xlsm', '.xlsx')):
-                filepath = os.path.join(REPORTS_DIR, f)
-                created_at = os.path.getctime(filepath)
-                reports.append({
-                    "filename": f,
-                    "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at)),
-                    "timestamp": created_at
-                })
-                
+        with os.scandir(REPORTS_DIR) as it:
+            for entry in it:
+                if entry.name.lower().endswith(('.csv', '.xlsm', '.xlsx')):
+                    created_at = entry.stat(follow_symlinks=False).st_ctime
+                    reports.append((_report_stem(entry.name), {
+                        "filename": entry.name,
+                        "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at)),
+                        "timestamp": created_at
+                    }))
         # Sort by newest first
-        reports.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return jsonify({"success": True, "history": reports})
-        
-    except Exception as e:
-        print(f"History fetch failed: {e}")
-        return jsonify({"success": False, "message": str(e)}), 500
+        reports.sort(key=lambda x: x[1]['timestamp'], reverse=True)
+        idx = _REPORTS_INDEX = {'mtime': mtime, 'reports': reports, 'by_deal': {}}
+
+    history = idx['by_deal'].get(deal_id)
+    if history is None:
+        # Generated names end in '_{deal_id}' before the report kind; others fall back to a substring match
+        suffix = '_' + deal_id
+        history = [
+            r for stem, r in idx['reports']
+            if (stem.endswith(suffix) if stem is not None else deal_id in r['filename'])
+        ]
+        idx['by_deal'][deal_id] = history
+    return history
 
 @app.route('/api/reports/download/<filename>', methods=['GET'])
 def download_report(filename):
+    filepath = safe_join(REPORTS_DIR, filename)
     try:
-        return send_from_directory(REPORTS_DIR, filename, as_attachment=True)
-    except Exception as e:
+        st = os.stat(filepath) if filepath is not None else None
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
         return jsonify({"success": False, "message": "File not found"}), 404
+    # Report filenames are timestamped and never rewritten, so clients may cache them
+    return send_file(
+        filepath,
+        as_attachment=True,
+        download_name=filename,
+        conditional=True,
+        etag=True,
+        last_modified=st.st_mtime,
+        max_age=3600
+    )
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Dev server only; production runs gunicorn against backend.wsgi
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') == 'development')
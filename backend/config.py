@@ -2,7 +2,10 @@
 Configuration for LLM API
 Change only the API key and model to switch between different LLM providers
 """
+import logging
 import os
+from functools import lru_cache
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -34,17 +37,34 @@ LLM_BASE_URL = os.environ.get('LLM_BASE_URL')
 
 MAX_OCR_CHARS = 100000  # Maximum characters to send to LLM
 MAX_TOKENS = 16000      # Maximum tokens for response
+MAX_TOKENS_SMALL = 2048 # Response budget for the small capex / ΔWC / debt sub-schemas
 TEMPERATURE = 0         # 0 = deterministic, 1 = creative
+LLM_MAX_OUTPUT_TOKENS = int(os.environ.get('LLM_MAX_OUTPUT_TOKENS', MAX_TOKENS * 2))  # Cap on a combined sub-extraction call's response budget
+LLM_DISK_CACHE = os.environ.get('LLM_DISK_CACHE', '1') != '0'  # Reuse responses for identical prompts
+LLM_WORKERS = int(os.environ.get('LLM_WORKERS', 8))  # Concurrent sub-extraction LLM calls (all extractions)
+LLM_MAX_CONCURRENT = int(os.environ.get('LLM_MAX_CONCURRENT', 16))  # In-flight LLM requests per process, main calls included
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 4))  # Backoff retries on 429/5xx/timeouts per request
+LLM_COMBINED_SUBSECTIONS = os.environ.get('LLM_COMBINED_SUBSECTIONS', '0') == '1'  # One call for all sub-extractions
+LLM_SHARED_PREFIX = os.environ.get('LLM_SHARED_PREFIX', '0') == '1'  # Put the OCR text first for provider prefix caching
+LLM_SKIP_PRESENT_SECTIONS = os.environ.get('LLM_SKIP_PRESENT_SECTIONS', '0') == '1'  # Skip sub-extractions the main call already filled
+LLM_SECTION_SLICES = os.environ.get('LLM_SECTION_SLICES', '0') == '1'  # Send sub-extractions only the OCR text around their keywords
+LLM_CACHE_CONTROL = os.environ.get('LLM_CACHE_CONTROL', '0') == '1'  # Mark the shared prompt prefix cache_control: ephemeral (Anthropic via gateways)
 
 # ============================================================================
 # FILE PATHS
 # ============================================================================
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PARSED_TEXT_DIR = os.path.join(BASE_DIR, 'backend', 'parsed_text')
-EXTRACTED_DATA_DIR = os.path.join(BASE_DIR, 'backend', 'extracted_data')
-REVENUE_DATA_DIR = os.path.join(BASE_DIR, 'backend', 'revenue_data_json')
-REPORTS_DIR = os.path.join(BASE_DIR, 'backend', 'reports')
+# pathlib.Path objects built once; compose with `/` (os.* functions accept them directly)
+# absolute() only consults the cwd when __file__ is relative; resolve() would lstat every component
+BASE_DIR = Path(__file__).absolute().parent.parent
+BACKEND_DIR = BASE_DIR / 'backend'
+PARSED_TEXT_DIR = BACKEND_DIR / 'parsed_text'
+EXTRACTED_DATA_DIR = BACKEND_DIR / 'extracted_data'
+REVENUE_DATA_DIR = BACKEND_DIR / 'revenue_data_json'
+REPORTS_DIR = BACKEND_DIR / 'reports'
+
+# fdatasync extracted JSON before returning; off by default (the SQLite store is the durable copy)
+FSYNC_WRITES = os.environ.get('ATAR_FSYNC', '0') == '1'
 
 # ============================================================================
 # EXCEL TEMPLATE
@@ -57,12 +77,12 @@ def get_excel_template_path() -> str:
     if EXCEL_TEMPLATE_PATH and os.path.exists(EXCEL_TEMPLATE_PATH):
         return EXCEL_TEMPLATE_PATH
 
-    base_parent = os.path.dirname(BASE_DIR)
+    base_parent = BASE_DIR.parent
     candidates = []
     try:
         for name in os.listdir(base_parent):
             if name.lower().endswith(('.xlsm', '.xlsx')):
-                candidates.append(os.path.join(base_parent, name))
+                candidates.append(str(base_parent / name))
     except Exception:
         candidates = []
 
@@ -74,38 +94,47 @@ def get_excel_template_path() -> str:
         "Excel template not found. Set EXCEL_TEMPLATE_PATH env var or place a .xlsm/.xlsx next to the project root."
     )
 
-# Create directories immediately on import
-os.makedirs(PARSED_TEXT_DIR, exist_ok=True)
-os.makedirs(EXTRACTED_DATA_DIR, exist_ok=True)
-os.makedirs(REVENUE_DATA_DIR, exist_ok=True)
-os.makedirs(REPORTS_DIR, exist_ok=True)
-
-print(f"📁 Config loaded:")
-print(f"   Parsed text dir: {PARSED_TEXT_DIR}")
-print(f"   Extracted data dir: {EXTRACTED_DATA_DIR}")
-print(f"   Revenue Data dir: {REVENUE_DATA_DIR}")
-print(f"   Reports dir: {REPORTS_DIR}")
-print(f"   LLM Model: {LLM_MODEL}")
-print(f"   API Key: {'✓ SET' if LLM_API_KEY else '✗ NOT SET'}")
-if LLM_API_KEY:
-    print(f"   API Key (masked): {LLM_API_KEY[:5]}...{LLM_API_KEY[-4:]}")
-print(f"   Base URL: {LLM_BASE_URL}")
+# Directories are created by the writers on first use, not on import
+@lru_cache(maxsize=None)
+def ensure_dir(path):
+    """Create path (once per process) and return it"""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+log = logging.getLogger(__name__)
+if log.isEnabledFor(logging.DEBUG):
+    log.debug(
+        "📁 Config loaded: parsed_text=%s extracted_data=%s revenue_data=%s reports=%s "
+        "model=%s api_key=%s base_url=%s",
+        PARSED_TEXT_DIR, EXTRACTED_DATA_DIR, REVENUE_DATA_DIR, REPORTS_DIR, LLM_MODEL,
+        f"{LLM_API_KEY[:5]}...{LLM_API_KEY[-4:]}" if LLM_API_KEY else "NOT SET", LLM_BASE_URL
+    )
 
 # ============================================================================
 # VALIDATION HELPERS
 # ============================================================================
 
+# Settings are read once from the environment, so the answers never change mid-process
+_IS_CONFIGURED = LLM_API_KEY is not None and len(LLM_API_KEY) > 0
+
 def is_configured():
     """Check if system is properly configured"""
-    return LLM_API_KEY is not None and len(LLM_API_KEY) > 0
+    return _IS_CONFIGURED
 
+@lru_cache(maxsize=1)
 def get_config_status():
-    """Get detailed configuration status"""
+    """Get detailed configuration status (computed once; see reset_config_cache)"""
+    # Every data dir is a child of backend/, so one directory read answers all existence checks
+    with os.scandir(BACKEND_DIR) as it:
+        subdirs = {e.name for e in it if e.is_dir()}
     return {
         "api_key_set": LLM_API_KEY is not None,
         "model": LLM_MODEL,
-        "parsed_text_dir_exists": os.path.exists(PARSED_TEXT_DIR),
-        "extracted_data_dir_exists": os.path.exists(EXTRACTED_DATA_DIR),
+        "parsed_text_dir_exists": PARSED_TEXT_DIR.name in subdirs,
+        "extracted_data_dir_exists": EXTRACTED_DATA_DIR.name in subdirs,
         "is_ready": is_configured()
     }
 
+def reset_config_cache():
+    """Recompute get_config_status on its next call"""
+    get_config_status.cache_clear()
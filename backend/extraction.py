@@ -4,19 +4,39 @@ Extracts financial metrics from OCR text and returns JSON schema
 """
 import os
 import json
+import hashlib
+import importlib.util
+import logging
 import re
+import tempfile
+import orjson
+import threading
 import time
-import traceback
-from typing import Optional, Dict, Any, List
-from openai import OpenAI
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 from .config import (
     LLM_API_KEY, 
     LLM_MODEL, 
     LLM_BASE_URL,
     MAX_OCR_CHARS, 
     MAX_TOKENS, 
+    MAX_TOKENS_SMALL,
     TEMPERATURE,
-    EXTRACTED_DATA_DIR
+    LLM_MAX_OUTPUT_TOKENS,
+    LLM_DISK_CACHE,
+    LLM_WORKERS,
+    LLM_MAX_CONCURRENT,
+    LLM_MAX_RETRIES,
+    LLM_COMBINED_SUBSECTIONS,
+    LLM_SHARED_PREFIX,
+    LLM_SKIP_PRESENT_SECTIONS,
+    LLM_SECTION_SLICES,
+    LLM_CACHE_CONTROL,
+    EXTRACTED_DATA_DIR,
+    FSYNC_WRITES,
+    ensure_dir
 )
 from .schema import (
     get_extraction_schema,
@@ -26,15 +46,220 @@ from .schema import (
     get_balance_sheet_schema,
     get_debt_profile_schema,
     get_transaction_assumptions_schema,
+    get_interest_schedule_schema,
     validate_schema
 )
 from .fallback_resolver import apply_fallback_resolution
 
+if TYPE_CHECKING:
+    # openai (httpx, pydantic, ...) is imported on first client creation, not with this module
+    from openai import OpenAI
+
+log = logging.getLogger(__name__)
+
+# Schemas embedded in the prompts, built once. Read-only: callers that need a
+# mutable template (e.g. _normalize_extracted_data) still call get_*_schema().
+_SCHEMAS = {
+    "extraction": get_extraction_schema(),
+    "free_cash_flow": get_free_cash_flow_schema(),
+    "capex": get_capex_schema(),
+    "change_in_working_capital": get_change_in_working_capital_schema(),
+    "balance_sheet": get_balance_sheet_schema(),
+    "debt_profile": get_debt_profile_schema(),
+    "transaction_assumptions": get_transaction_assumptions_schema(),
+    "interest_schedule": get_interest_schedule_schema(),
+}
+# Pretty-printed once; json (not orjson) keeps the prompt text byte-identical to before
+_SCHEMA_JSON = {name: json.dumps(schema, indent=2) for name, schema in _SCHEMAS.items()}
+
+
+# Regexes used on every parsed label / LLM response, compiled once
+_YEAR_4_RE = re.compile(r"(19\d{2}|20\d{2})")
+_YEAR_SUFFIX_RE = re.compile(r"-(\d{2})\b")
+_FY_YEAR_RE = re.compile(r"\bFY\s?(\d{2})(?!\d)", re.IGNORECASE)
+_NON_NUMERIC_RE = re.compile(r"[^0-9.\-]")
+_FENCE_JSON_OPEN_RE = re.compile(r'^```json\s*', re.MULTILINE)
+_FENCE_CLOSE_RE = re.compile(r'\s*```$', re.MULTILINE)
+_FENCE_OPEN_RE = re.compile(r'^```\s*', re.MULTILINE)
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> "OpenAI":
+    """One OpenAI client (and its HTTP connection pool) per API key, reused across extractions"""
+    from openai import OpenAI, DefaultHttpxClient, Timeout, DEFAULT_CONNECTION_LIMITS
+    # Limits class of whichever httpx build this openai release uses
+    limits_cls = type(DEFAULT_CONNECTION_LIMITS)
+    http_client = DefaultHttpxClient(
+        # Multiplex the concurrent sub-extractions over one TLS connection when h2 is installed
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=limits_cls(
+            max_connections=max(LLM_WORKERS * 2, 16),
+            max_keepalive_connections=max(LLM_WORKERS * 2, 16),
+            # Keep connections warm between uploads instead of the 5s default
+            keepalive_expiry=120.0
+        ),
+        # Generations can run for minutes; only fail fast on connect
+        timeout=Timeout(600.0, connect=10.0)
+    )
+    client_config = {
+        "api_key": api_key,
+        "http_client": http_client,
+        # The SDK retries 408/409/429/5xx and connection errors with jittered exponential
+        # backoff (honouring Retry-After), so a transient failure costs one section, not the deal
+        "max_retries": LLM_MAX_RETRIES
+    }
+    if LLM_BASE_URL:
+        client_config["base_url"] = LLM_BASE_URL
+    return OpenAI(**client_config)
+
+
+# Fixed opening of every request in LLM_SHARED_PREFIX mode, so all calls for one document
+# start with the same (preamble, OCR text) prefix that providers can cache
+_DOCUMENT_PREAMBLE = (
+    "You are a financial data extraction assistant. The next message is the OCR text of an "
+    "investment document. Instructions for what to extract from it follow after the document."
+)
+
+
+def _document_messages(system_prompt: str, instruction: str, ocr_text: str, context: str = "") -> List[Dict[str, str]]:
+    """
+    Chat messages asking for `instruction` over the OCR text.
+    Default layout: task prompt, then instruction + OCR text. With LLM_SHARED_PREFIX the
+    document comes first and the task-specific prompt after it.
+    """
+    if not LLM_SHARED_PREFIX:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{instruction}:{context}\n\n{ocr_text}"},
+        ]
+    return [
+        {"role": "system", "content": _DOCUMENT_PREAMBLE},
+        {"role": "user", "content": ocr_text},
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{instruction} (the OCR text above).{context}\n\nReturn the JSON now."},
+    ]
+
+
+def _prompt_cache_params(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    create() kwargs carrying `messages` plus provider prompt-cache hints. Requests start with
+    a prefix shared across calls (the task prompt, or with LLM_SHARED_PREFIX the
+    preamble + OCR text), which is what the hints point at.
+    """
+    prefix_end = 1 if LLM_SHARED_PREFIX else 0
+    params: Dict[str, Any] = {"messages": messages}
+    if not LLM_BASE_URL:
+        # OpenAI caches prefixes automatically; a stable key per prefix keeps those requests
+        # on the same cache. Sent via extra_body so SDKs without the argument still work.
+        prefix = "\0".join(m["content"] for m in messages[:prefix_end + 1])
+        params["extra_body"] = {
+            "prompt_cache_key": "atar-" + hashlib.blake2b(prefix.encode(), digest_size=8).hexdigest()
+        }
+    if LLM_CACHE_CONTROL:
+        # Anthropic only caches up to an explicit breakpoint; OpenAI-compatible gateways
+        # (OpenRouter, LiteLLM) pass cache_control through on content parts
+        marked = dict(messages[prefix_end])
+        marked["content"] = [{"type": "text", "text": marked["content"], "cache_control": {"type": "ephemeral"}}]
+        params["messages"] = messages[:prefix_end] + [marked] + messages[prefix_end + 1:]
+    return params
+
+
+# Shared by every extraction for its concurrent sub-extraction calls
+_LLM_POOL = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix='llm')
+
+# Caps requests in flight across all extractions (pool and pipeline threads) to stay under
+# provider rate limits; a slot is held through the SDK's retry backoff
+_LLM_SLOTS = threading.BoundedSemaphore(LLM_MAX_CONCURRENT)
+
+
+# Content-addressed cache of LLM responses: blake2b(model, sampling params, messages) -> content
+_LLM_CACHE_DIR = EXTRACTED_DATA_DIR / "_llm_cache"
+
+# Most recent responses by the same key, so re-runs in this process skip the file read too
+_LLM_MEMO: "OrderedDict[str, str]" = OrderedDict()
+_LLM_MEMO_SIZE = 256
+_llm_memo_lock = threading.Lock()
+
+
+def _memo_response(key: str, content: Optional[str] = None) -> Optional[str]:
+    """Look up key in _LLM_MEMO, or store content under it when given"""
+    with _llm_memo_lock:
+        if content is None:
+            content = _LLM_MEMO.get(key)
+            if content is not None:
+                _LLM_MEMO.move_to_end(key)
+            return content
+        _LLM_MEMO[key] = content
+        if len(_LLM_MEMO) > _LLM_MEMO_SIZE:
+            _LLM_MEMO.popitem(last=False)
+        return content
+
+
+def _chat_completion(
+    client: "OpenAI",
+    messages: List[Dict[str, str]],
+    temperature: float = TEMPERATURE,
+    max_tokens: int = MAX_TOKENS
+) -> Optional[str]:
+    """
+    JSON-mode chat completion returning the message content.
+    Identical requests (same model, params and prompt text) are served from _LLM_MEMO,
+    then _LLM_CACHE_DIR.
+    """
+    key = cache_path = None
+    if LLM_DISK_CACHE:
+        h = hashlib.blake2b(f"{LLM_MODEL}|{temperature}|{max_tokens}".encode(), digest_size=16)
+        for m in messages:
+            h.update(b"\0" + m["role"].encode() + b"\0" + m["content"].encode())
+        key = h.hexdigest()
+        cached = _memo_response(key)
+        if cached is not None:
+            return cached
+        cache_path = _LLM_CACHE_DIR / f"{key}.json"
+        try:
+            with open(cache_path, 'rb') as f:
+                return _memo_response(key, orjson.loads(f.read())["content"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    with _LLM_SLOTS:
+        response = client.chat.completions.create(
+            model=LLM_MODEL,
+            response_format={"type": "json_object"},  # Force JSON output
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **_prompt_cache_params(messages)
+        )
+    choice = response.choices[0]
+    content = choice.message.content
+
+    # A reply cut off at max_tokens is not valid JSON; say so up front and keep it
+    # out of the cache so a retry actually calls the API again.
+    if getattr(choice, 'finish_reason', None) == 'length':
+        log.warning("⚠️ LLM response truncated at max_tokens=%s", max_tokens)
+        return content
+
+    if cache_path is not None and content:
+        # Only replies that parse are cached; a malformed one must not be replayed on retry
+        try:
+            _parse_json_safely(content)
+        except ValueError:
+            log.warning("⚠️ LLM response is not valid JSON; not caching it")
+            return content
+        _memo_response(key, content)
+        try:
+            ensure_dir(_LLM_CACHE_DIR)
+            _atomic_write(str(cache_path), orjson.dumps({"model": LLM_MODEL, "content": content}))
+        except OSError as e:
+            log.warning("⚠️ Failed to cache LLM response: %s", e)
+    return content
+
 # ============================================================================
 # MAIN EXTRACTION FUNCTION
 # ============================================================================
 
-def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = None, source_path: str = None, user_deal_value: str = None) -> Dict[str, Any]:
+def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = None, source_path: str = None, user_deal_value: str = None, force_separate: bool = False) -> Dict[str, Any]:
     """
     Extract financial metrics from OCR text and return structured JSON schema.
     
@@ -52,6 +277,7 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
     deal_id (str, optional): Deal identifier for file naming
     source_path (str, optional): Path to the source text file
     user_deal_value (str, optional): The user-inputted deal value for AI context
+    force_separate (bool, optional): Run every sub-extraction even with LLM_SKIP_PRESENT_SECTIONS
     
     Returns:
     dict: Structured financial data matching schema.py format
@@ -60,9 +286,7 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
     ValueError: Invalid input (empty text, missing API key)
     RuntimeError: API call or processing failure
     """
-    print("\n" + "="*80)
-    print("🤖 FINANCIAL EXTRACTION ENGINE - STARTED")
-    print("="*80)
+    log.info("🤖 FINANCIAL EXTRACTION ENGINE - STARTED")
     
     # -------------------------------------------------------------------------
     # STEP 1: INPUT VALIDATION
@@ -75,22 +299,17 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
     if not ocr_text or len(ocr_text.strip()) < 10:
         raise ValueError(f"❌ OCR text too short: {len(ocr_text) if ocr_text else 0} chars (min 10)")
     
-    print(f"✓ Input validated")
-    print(f"  Deal ID: {deal_id or 'Not specified'}")
-    print(f"  OCR Text: {len(ocr_text):,} characters")
-    print(f"  Model: {LLM_MODEL}")
+    log.info("✓ Input validated (deal %s, %s chars, model %s)", deal_id or 'not specified', format(len(ocr_text), ','), LLM_MODEL)
     
     # -------------------------------------------------------------------------
     # STEP 2: INITIALIZE LLM CLIENT
     # -------------------------------------------------------------------------
     try:
-        client_config = {"api_key": api_key}
         if LLM_BASE_URL:
-            client_config["base_url"] = LLM_BASE_URL
-            print(f"✓ Using custom endpoint: {LLM_BASE_URL}")
+            log.info("✓ Using custom endpoint: %s", LLM_BASE_URL)
         
-        client = OpenAI(**client_config)
-        print(f"✓ LLM client initialized")
+        client = _get_client(api_key)
+        log.info("✓ LLM client initialized")
         
     except Exception as e:
         raise RuntimeError(f"❌ Failed to initialize LLM client: {e}")
@@ -98,14 +317,22 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
     # -------------------------------------------------------------------------
     # STEP 3: PREPARE INPUT (TRUNCATE IF NEEDED)
     # -------------------------------------------------------------------------
+    # Truncated once here; every sub-extraction below receives this same string
     if len(ocr_text) > MAX_OCR_CHARS:
-        print(f"⚠️  Truncating OCR text: {len(ocr_text):,} → {MAX_OCR_CHARS:,} chars")
+        log.warning("⚠️  Truncating OCR text: %s → %s chars", format(len(ocr_text), ','), format(MAX_OCR_CHARS, ','))
         ocr_text = ocr_text[:MAX_OCR_CHARS]
     
+    # The sub-extractions only need the OCR text, so they run on _LLM_POOL while the
+    # main call is in flight; results are merged below in the original order.
+    # With LLM_SKIP_PRESENT_SECTIONS they wait for the main response instead, and only
+    # the sections it did not fill are requested.
+    skip_present = LLM_SKIP_PRESENT_SECTIONS and not force_separate
+    sub_results = {} if skip_present else _submit_subsections(client, ocr_text, deal_id)
+    
     # -------------------------------------------------------------------------
     # STEP 4: CALL LLM API FOR EXTRACTION
     # -------------------------------------------------------------------------
-    print(f"\n🔍 Analyzing document with AI...")
+    log.info("🔍 Analyzing document with AI...")
     
     try:
         start_time = time.time()
@@ -114,30 +341,22 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
         if user_deal_value:
             user_context = f"\n\n**USER CONTEXT:**\nThe user is considering this deal at a valuation of: {user_deal_value}.\nPlease use this valuation when making your AI Recommendation (Buy/Hold/Sell) and determining if it's a good investment based on the extracted financial metrics."
 
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": _build_extraction_prompt()
-                },
-                {
-                    "role": "user", 
-                    "content": f"Extract all financial metrics from this document:{user_context}\n\n{ocr_text}"
-                }
-            ],
-            response_format={"type": "json_object"},  # Force JSON output
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(
+                _build_extraction_prompt(),
+                "Extract all financial metrics from this document",
+                ocr_text,
+                context=user_context
+            )
         )
         
         elapsed = time.time() - start_time
-        print(f"✓ LLM response received ({elapsed:.2f}s)")
+        log.info("✓ LLM response received (%.2fs)", elapsed)
         
     except Exception as e:
         error_msg = f"LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
-        traceback.print_exc()
+        log.error("❌ %s", error_msg, exc_info=True)
         
         # Save error log for debugging
         if deal_id:
@@ -149,142 +368,83 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
     # STEP 5: PARSE AND VALIDATE JSON RESPONSE
     # -------------------------------------------------------------------------
     try:
-        raw_content = response.choices[0].message.content
-        
         if not raw_content:
             raise ValueError("LLM returned empty response")
         
-        print(f"✓ Response size: {len(raw_content):,} characters")
+        log.info("✓ Response size: %s characters", format(len(raw_content), ','))
         
         # Parse JSON (handle potential markdown wrapping)
         extracted_data = _parse_json_safely(raw_content)
-        print(f"✓ JSON parsed successfully")
-
-        extracted_data = _normalize_extracted_data(extracted_data)
-
-        try:
-            capex_only = _extract_capex_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
-            capex_obj = None
-            if isinstance(capex_only, dict):
-                tot = capex_only.get("tale_of_the_tape")
-                if isinstance(tot, dict):
-                    capex_obj = tot.get("capex")
-
-            if isinstance(capex_obj, dict):
-                tale = extracted_data.get("tale_of_the_tape")
-                if not isinstance(tale, dict):
-                    tale = {}
-                tale = dict(tale)
-                tale["capex"] = capex_obj
-                extracted_data["tale_of_the_tape"] = tale
-
-            extracted_data["tale_of_the_tape"] = _normalize_tale_of_the_tape(
-                extracted_data.get("tale_of_the_tape"),
-                extracted_data
-            )
-        except Exception as e:
-            print(f"⚠️  Separate CAPEX extraction failed: {e}")
-            extracted_data["tale_of_the_tape"] = _normalize_tale_of_the_tape(
-                extracted_data.get("tale_of_the_tape"),
-                extracted_data
-            )
+        log.info("✓ JSON parsed successfully")
+
+        if skip_present:
+            # Judge the raw response; normalization below fills in derived values
+            present = {name: _present_section(extracted_data, name) for name, _ in _SUBSECTION_EXTRACTORS}
+            missing = [name for name, section in present.items() if section is None]
+            sub_results = _submit_subsections(client, ocr_text, deal_id, missing)
+            for name, section in present.items():
+                if section is not None:
+                    sub_results[name] = _completed_section(name, section)
+            log.info("✓ Sections already in main response: %s/%s; extracting %s separately", len(present) - len(missing), len(present), missing or 'none')
+
+        # Both tale-of-the-tape sub-results are merged into a copy of the tale, which is
+        # normalized once; the whole result is normalized (and stamped) at the end
+        extracted_data = dict(extracted_data) if isinstance(extracted_data, dict) else get_extraction_schema()
+        tale = extracted_data.get("tale_of_the_tape")
+        tale = dict(tale) if isinstance(tale, dict) else {}
+        for metric_key, label in (("capex", "CAPEX"), ("change_in_working_capital", "WC")):
+            try:
+                metric_only = _section_result(sub_results, metric_key)
+                tot = metric_only.get("tale_of_the_tape") if isinstance(metric_only, dict) else None
+                metric_obj = tot.get(metric_key) if isinstance(tot, dict) else None
+                if isinstance(metric_obj, dict):
+                    tale[metric_key] = metric_obj
+            except Exception as e:
+                log.warning("⚠️  Separate %s extraction failed: %s", label, e)
 
-        try:
-            wc_only = _extract_change_in_working_capital_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
-            wc_obj = None
-            if isinstance(wc_only, dict):
-                tot = wc_only.get("tale_of_the_tape")
-                if isinstance(tot, dict):
-                    wc_obj = tot.get("change_in_working_capital")
-
-            if isinstance(wc_obj, dict):
-                tale = extracted_data.get("tale_of_the_tape")
-                if not isinstance(tale, dict):
-                    tale = {}
-                tale = dict(tale)
-                tale["change_in_working_capital"] = wc_obj
-                extracted_data["tale_of_the_tape"] = tale
-
-            extracted_data["tale_of_the_tape"] = _normalize_tale_of_the_tape(
-                extracted_data.get("tale_of_the_tape"),
-                extracted_data
-            )
-        except Exception as e:
-            print(f"⚠️  Separate WC extraction failed: {e}")
-            extracted_data["tale_of_the_tape"] = _normalize_tale_of_the_tape(
-                extracted_data.get("tale_of_the_tape"),
-                extracted_data
-            )
+        extracted_data["tale_of_the_tape"] = _normalize_tale_of_the_tape(tale, extracted_data)
 
         try:
-            free_cash_flow_only = _extract_free_cash_flow_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
+            free_cash_flow_only = _section_result(sub_results, "free_cash_flow")
             if isinstance(free_cash_flow_only, dict) and free_cash_flow_only:
                 extracted_data["free_cash_flow"] = _normalize_free_cash_flow(
                     free_cash_flow_only.get("free_cash_flow"),
                     extracted_data
                 )
         except Exception as e:
-            print(f"⚠️  Separate FCF extraction failed: {e}")
+            log.warning("⚠️  Separate FCF extraction failed: %s", e)
             extracted_data["free_cash_flow"] = _normalize_free_cash_flow(
                 extracted_data.get("free_cash_flow"),
                 extracted_data
             )
             
         try:
-            bs_only = _extract_balance_sheet_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
+            bs_only = _section_result(sub_results, "balance_sheet")
             if isinstance(bs_only, dict) and "balance_sheet" in bs_only:
                 extracted_data["balance_sheet"] = bs_only["balance_sheet"]
         except Exception as e:
-            print(f"⚠️  Separate Balance Sheet extraction failed: {e}")
+            log.warning("⚠️  Separate Balance Sheet extraction failed: %s", e)
 
         try:
-            dp_only = _extract_debt_profile_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
+            dp_only = _section_result(sub_results, "debt_profile")
             if isinstance(dp_only, dict) and "debt_profile" in dp_only:
                 extracted_data["debt_profile"] = dp_only["debt_profile"]
         except Exception as e:
-            print(f"⚠️  Separate Debt Profile extraction failed: {e}")
+            log.warning("⚠️  Separate Debt Profile extraction failed: %s", e)
 
         try:
-            ta_only = _extract_transaction_assumptions_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
+            ta_only = _section_result(sub_results, "transaction_assumptions")
             if isinstance(ta_only, dict) and "transaction_assumptions" in ta_only:
                 extracted_data["transaction_assumptions"] = ta_only["transaction_assumptions"]
         except Exception as e:
-            print(f"⚠️  Separate Transaction Assumptions extraction failed: {e}")
+            log.warning("⚠️  Separate Transaction Assumptions extraction failed: %s", e)
 
         try:
-            is_only = _extract_interest_schedule_separately(
-                client=client,
-                ocr_text=ocr_text,
-                deal_id=deal_id
-            )
+            is_only = _section_result(sub_results, "interest_schedule")
             if isinstance(is_only, dict) and "interest_schedule" in is_only:
                 extracted_data["interest_schedule"] = is_only["interest_schedule"]
         except Exception as e:
-            print(f"⚠️  Separate Interest Schedule extraction failed: {e}")
+            log.warning("⚠️  Separate Interest Schedule extraction failed: %s", e)
             
         # -------------------------------------------------------------------------
         # APPLY FALLBACK RESOLVER (4-Step Safety Net)
@@ -292,26 +452,23 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
         try:
             extracted_data = apply_fallback_resolution(extracted_data, ocr_text)
         except Exception as e:
-            print(f"⚠️  Fallback Resolver failed (Continuing with raw AI data): {e}")
-            traceback.print_exc()
+            log.warning("⚠️  Fallback Resolver failed (Continuing with raw AI data): %s", e, exc_info=True)
         
         # Validate against schema
         is_valid, errors = validate_schema(extracted_data)
         
         if not is_valid:
-            print(f"⚠️  Schema validation warnings:")
-            for err in errors[:5]:  # Show first 5
-                print(f"   - {err}")
+            log.warning("⚠️  Schema validation warnings:\n%s", "\n".join(f"   - {err}" for err in errors[:5]))  # Show first 5
         else:
-            print(f"✓ Schema validation passed")
+            log.info("✓ Schema validation passed")
         
         # Log extracted summary
         _log_extraction_summary(extracted_data)
         
     except json.JSONDecodeError as e:
         error_msg = f"Failed to parse JSON: {e}"
-        print(f"❌ {error_msg}")
-        print(f"Raw response preview: {raw_content[:500]}...")
+        log.error("❌ %s", error_msg)
+        log.error("Raw response preview: %s...", raw_content[:500])
         
         if deal_id:
             _save_error_log(deal_id, f"{error_msg}\n\nRaw: {raw_content}", "JSON_PARSE_ERROR")
@@ -319,60 +476,85 @@ def extract_financial_data(ocr_text: str, api_key: str = None, deal_id: str = No
         raise RuntimeError(error_msg)
     
     except Exception as e:
-        print(f"❌ Validation error: {e}")
-        traceback.print_exc()
+        log.error("❌ Validation error: %s", e, exc_info=True)
         raise
 
+    # Normalized and stamped here so readers can skip it (see CURRENT_SCHEMA)
+    extracted_data = normalize_extracted_data(extracted_data)
+
     # -------------------------------------------------------------------------
     # STEP 6: SAVE TO FILE SYSTEM
     # -------------------------------------------------------------------------
     if deal_id:
-        print(f"\n💾 Saving extracted data...")
+        log.info("💾 Saving extracted data...")
         
         saved_path = save_extracted_data(deal_id, extracted_data, source_path)
         
         if saved_path:
-            print(f"✓ Data saved: {os.path.basename(saved_path)}")
+            log.info("✓ Data saved: %s", os.path.basename(saved_path))
         else:
-            print(f"⚠️  File save failed (data still returned)")
+            log.warning("⚠️  File save failed (data still returned)")
     
     # -------------------------------------------------------------------------
     # COMPLETE
     # -------------------------------------------------------------------------
-    print("\n" + "="*80)
-    print("✅ EXTRACTION COMPLETE")
-    print("="*80 + "\n")
+    log.info("✅ EXTRACTION COMPLETE")
     
     return extracted_data
 
 
+def extract_financial_data_batch(items: List[Dict[str, Any]], max_workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Run extract_financial_data for several deals at once.
+    
+    Each deal's critical path is its LLM round trips, so overlapping deals cuts the
+    wall-clock of a bulk upload to roughly len(items) / max_workers deals. Overall
+    request concurrency is still capped by LLM_MAX_CONCURRENT.
+    
+    Args:
+    items (list): keyword arguments for extract_financial_data, one dict per deal
+    max_workers (int): deals extracted concurrently
+    
+    Returns:
+    list: extracted data per item, in input order; a failed item yields
+          {"error": True, "error_type": <exception name>, "message": ..., "deal_id": ...}
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='extract-batch') as pool:
+        futures = {pool.submit(extract_financial_data, **item): i for i, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = {
+                    "error": True,
+                    "error_type": type(e).__name__,
+                    "message": str(e),
+                    "deal_id": items[i].get("deal_id")
+                }
+            log.info("📦 Batch extraction: %s/%s deals done", done, len(items))
+    return results
+
+
 def _extract_capex_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_capex_prompt()},
-                {"role": "user", "content": f"Extract CAPEX from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_capex_prompt(), "Extract CAPEX from this OCR text", ocr_text),
+            max_tokens=MAX_TOKENS_SMALL
         )
     except Exception as e:
         error_msg = f"CAPEX-only LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "CAPEX_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     if not raw_content:
         raise ValueError("CAPEX-only LLM returned empty response")
 
@@ -382,8 +564,9 @@ def _extract_capex_separately(
     return capex_only
 
 
+@lru_cache(maxsize=1)
 def _build_capex_prompt() -> str:
-    capex_schema = json.dumps(get_capex_schema(), indent=2)
+    capex_schema = _SCHEMA_JSON["capex"]
     return f"""
 You are a financial data extraction assistant.
 
@@ -425,32 +608,23 @@ Output Format (Strict)
 
 
 def _extract_change_in_working_capital_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_change_in_working_capital_prompt()},
-                {"role": "user", "content": f"Extract Change in Working Capital (ΔWC) from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_change_in_working_capital_prompt(), "Extract Change in Working Capital (ΔWC) from this OCR text", ocr_text),
+            max_tokens=MAX_TOKENS_SMALL
         )
     except Exception as e:
         error_msg = f"WC-only LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "WC_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     if not raw_content:
         raise ValueError("WC-only LLM returned empty response")
 
@@ -460,8 +634,9 @@ def _extract_change_in_working_capital_separately(
     return wc_only
 
 
+@lru_cache(maxsize=1)
 def _build_change_in_working_capital_prompt() -> str:
-    wc_schema = json.dumps(get_change_in_working_capital_schema(), indent=2)
+    wc_schema = _SCHEMA_JSON["change_in_working_capital"]
     return f"""
 You are a financial data extraction assistant.
 
@@ -532,32 +707,22 @@ Output Format (Strict)
 
 
 def _extract_free_cash_flow_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_free_cash_flow_prompt()},
-                {"role": "user", "content": f"Extract and forecast Free Cash Flow from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_free_cash_flow_prompt(), "Extract and forecast Free Cash Flow from this OCR text", ocr_text)
         )
     except Exception as e:
         error_msg = f"FCF-only LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "FCF_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     if not raw_content:
         raise ValueError("FCF-only LLM returned empty response")
 
@@ -567,8 +732,9 @@ def _extract_free_cash_flow_separately(
     return fcf_only
 
 
+@lru_cache(maxsize=1)
 def _build_free_cash_flow_prompt() -> str:
-    fcf_schema = json.dumps(get_free_cash_flow_schema(), indent=2)
+    fcf_schema = _SCHEMA_JSON["free_cash_flow"]
     return f"""
 You are a financial data extraction and forecasting assistant.
 
@@ -666,7 +832,7 @@ Sign Convention
 
 Output Format (Strict)
 - `free_cash_flow.historical` must include any year where FCF is found or calculable:
-  - `free_cash_flow.historical[<YEAR_LABEL>] = {"value":"<number or exact text>", "source":"direct|calculated|not_found", "method":"direct|OCF_minus_CAPEX|EBITDA_based|-"}`
+  - `free_cash_flow.historical[<YEAR_LABEL>] = {{"value":"<number or exact text>", "source":"direct|calculated|not_found", "method":"direct|OCF_minus_CAPEX|EBITDA_based|-"}}`
 - Always return `free_cash_flow.forecast_next_5_years` with base_year/growth_rate_used/methodology and exactly 5 forecast years.
 
 Example Output Shape (Illustrative)
@@ -692,38 +858,29 @@ Example Output Shape (Illustrative)
 
 
 def _extract_balance_sheet_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_balance_sheet_prompt()},
-                {"role": "user", "content": f"Extract Balance Sheet data from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_balance_sheet_prompt(), "Extract Balance Sheet data from this OCR text", ocr_text)
         )
     except Exception as e:
         error_msg = f"Balance Sheet LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "BS_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     bs_only = _parse_json_safely(raw_content)
     return bs_only
 
 
+@lru_cache(maxsize=1)
 def _build_balance_sheet_prompt() -> str:
-    schema = json.dumps(get_balance_sheet_schema(), indent=2)
+    schema = _SCHEMA_JSON["balance_sheet"]
     return f"""
 You are a financial data extraction assistant.
 Extract Balance Sheet items for all available historical years.
@@ -743,38 +900,30 @@ Instructions:
 
 
 def _extract_debt_profile_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_debt_profile_prompt()},
-                {"role": "user", "content": f"Extract Debt Profile / Facilities data from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_debt_profile_prompt(), "Extract Debt Profile / Facilities data from this OCR text", ocr_text),
+            max_tokens=MAX_TOKENS_SMALL
         )
     except Exception as e:
         error_msg = f"Debt Profile LLM API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "DEBT_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     dp_only = _parse_json_safely(raw_content)
     return dp_only
 
 
+@lru_cache(maxsize=1)
 def _build_debt_profile_prompt() -> str:
-    schema = json.dumps(get_debt_profile_schema(), indent=2)
+    schema = _SCHEMA_JSON["debt_profile"]
     return f"""
 You are a financial data extraction assistant.
 Extract information about the company's Debt Profile, Credit Facilities, Term Loans, and Revolvers.
@@ -796,10 +945,46 @@ Instructions:
 # FILE OPERATIONS
 # ============================================================================
 
+# fdatasync skips the metadata flush; not available on macOS / Windows
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+
+def _atomic_write(path: str, payload: bytes) -> None:
+    """Write payload to path via a temp file + os.replace, so readers never see a partial file"""
+    # Unique temp name per call, so concurrent writers to the same path never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            if FSYNC_WRITES:
+                f.flush()
+                _fdatasync(f.fileno())  # Force disk write
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Mirrors next to the source text (see save_extracted_data), written in order so a re-save
+# of the same source can't be overtaken by an older payload; pending writes finish at exit
+_SECONDARY_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='secondary-save')
+
+
+def _save_secondary_copy(secondary_path: str, payload: bytes) -> None:
+    try:
+        _atomic_write(secondary_path, payload)
+        log.info("✓ Also saved schema to: %s", os.path.basename(secondary_path))
+    except Exception as e:
+        log.warning("⚠️ Failed to save secondary copy to parsed_text: %s", e)
+
+
 def save_extracted_data(deal_id: str, data: Dict[str, Any], source_path: str = None) -> Optional[str]:
     """
-    Save extracted data to JSON file with verification.
-    Also saves a copy to the source directory if source_path is provided.
+    Save extracted data to a JSON file (written atomically).
+    Also saves a copy to the source directory if source_path is provided (in the background).
     
     Args:
         deal_id: Deal identifier
@@ -810,68 +995,52 @@ def save_extracted_data(deal_id: str, data: Dict[str, Any], source_path: str = N
         str: Path to saved file (in extracted_data dir), or None if failed
     """
     try:
-        # Generate filename with timestamp
-        timestamp = int(time.time())
+        if not data:
+            raise ValueError("Refusing to save empty JSON")
+        
+        # Generate filename with timestamp (ns, so saves within one second don't overwrite;
+        # load_extracted_data compares these numerically against older second-based names)
+        timestamp = time.time_ns()
         filename = f"{deal_id}_{timestamp}.json"
-        filepath = os.path.join(EXTRACTED_DATA_DIR, filename)
+        filepath = EXTRACTED_DATA_DIR / filename
         
         # Ensure directory exists
-        os.makedirs(EXTRACTED_DATA_DIR, exist_ok=True)
+        ensure_dir(EXTRACTED_DATA_DIR)
         
+        # Compact orjson (UTF-8 bytes) for the primary copy, which only the loader reads
+        payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
         # Write file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())  # Force disk write
+        _atomic_write(filepath, payload)
             
         # ---------------------------------------------------------------------
         # SECONDARY SAVE: parsed_text/[basename]_extracted.json
         # ---------------------------------------------------------------------
         if source_path:
-            try:
-                # E.g. /path/to/Project NetworkCIP... .txt -> /path/to/Project NetworkCIP..._extracted.json
-                src_dir = os.path.dirname(source_path)
-                src_basename = os.path.basename(source_path)
-                src_name = os.path.splitext(src_basename)[0]
-                
-                secondary_filename = f"{src_name}_extracted.json"
-                secondary_path = os.path.join(src_dir, secondary_filename)
-                
-                with open(secondary_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                    f.flush()
-                    os.fsync(f.fileno())
-                
-                print(f"✓ Also saved schema to: {secondary_filename}")
-                
-            except Exception as e:
-                print(f"⚠️ Failed to save secondary copy to parsed_text: {e}")
-        
-        # Verify file was written (primary)
-        if not os.path.exists(filepath):
-            raise IOError("File not found after write")
-        
-        file_size = os.path.getsize(filepath)
-        if file_size == 0:
-            raise IOError("File is empty after write")
-        
-        # Verify JSON integrity
-        with open(filepath, 'r', encoding='utf-8') as f:
-            verification = json.load(f)
-            if not verification:
-                raise ValueError("Saved file contains empty JSON")
+            # E.g. /path/to/Project NetworkCIP... .txt -> /path/to/Project NetworkCIP..._extracted.json
+            src_dir = os.path.dirname(source_path)
+            src_basename = os.path.basename(source_path)
+            src_name = os.path.splitext(src_basename)[0]
+            
+            secondary_filename = f"{src_name}_extracted.json"
+            secondary_path = os.path.join(src_dir, secondary_filename)
+            
+            # Convenience mirror for people to read, so indented; serialized here (the caller
+            # keeps and may change `data`) and written in the background so the caller doesn't wait
+            pretty = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            _SECONDARY_WRITER.submit(_save_secondary_copy, secondary_path, pretty)
         
-        return filepath
+        return str(filepath)
         
     except Exception as e:
-        print(f"❌ Save failed: {e}")
-        traceback.print_exc()
+        log.error("❌ Save failed: %s", e, exc_info=True)
         return None
 
 
 def load_extracted_data(deal_id: str) -> Optional[Dict[str, Any]]:
     """
     Load the most recent extracted data for a deal.
+    Memoized until EXTRACTED_DATA_DIR changes; treat the returned dict as read-only.
     
     Args:
         deal_id: Deal identifier
@@ -880,47 +1049,84 @@ def load_extracted_data(deal_id: str) -> Optional[Dict[str, Any]]:
         dict: Extracted data, or None if not found
     """
     try:
-        if not os.path.exists(EXTRACTED_DATA_DIR):
-            return None
-        
-        # Find all files for this deal
-        files = [
-            f for f in os.listdir(EXTRACTED_DATA_DIR)
-            if (f.startswith(f"{deal_id}_") or f == f"{deal_id}.json") and f.endswith('.json') and 'ERROR' not in f
-        ]
-        
-        if not files:
-            return None
-        
-        # Sort by timestamp (newest first)
-        files.sort(reverse=True)
-        latest_file = os.path.join(EXTRACTED_DATA_DIR, files[0])
-        
-        # Load and return
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        data = _normalize_extracted_data(data)
-        
-        print(f"📂 Loaded: {os.path.basename(latest_file)}")
-        return data
-        
+        st = os.stat(EXTRACTED_DATA_DIR)
+    except OSError:
+        return None
+    dir_key = (st.st_mtime_ns, st.st_size)
+    try:
+        if time.time_ns() - st.st_mtime_ns < _DIR_RACY_WINDOW_NS:
+            # Directory mtimes have coarse (clock-tick) granularity: a save landing in the same
+            # tick as this scan would keep the key, so a scan this close to a change isn't memoized
+            found = _newest_extracted_file.__wrapped__(deal_id, dir_key)
+        else:
+            found = _newest_extracted_file(deal_id, dir_key)
+        # Load and return; unchanged files (same mtime and size) skip the parse + normalize
+        return _read_extracted_file(*found)
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        print(f"❌ Load failed for {deal_id}: {e}")
+        log.error("❌ Load failed for %s: %s", deal_id, e)
         return None
 
 
+# How recently EXTRACTED_DATA_DIR must have changed for a scan to skip the memo
+_DIR_RACY_WINDOW_NS = 100_000_000
+
+
+# Newest file for a deal as (path, mtime_ns, size), keyed by (deal_id, EXTRACTED_DATA_DIR
+# (mtime_ns, size)). Every save adds a new timestamped file, which changes the key; superseded
+# entries simply age out of the LRU. "No file" raises FileNotFoundError, so it is never memoized.
+@lru_cache(maxsize=256)
+def _newest_extracted_file(deal_id: str, dir_key: Tuple[int, int]) -> Tuple[str, int, int]:
+    # One pass over the directory. The "<deal>_<timestamp>" suffix is compared as an integer,
+    # so timestamps of different widths still order correctly; the bare "<deal>.json" (or a
+    # non-numeric suffix) ranks below any timestamp.
+    prefix, exact = f"{deal_id}_", f"{deal_id}.json"
+    best = best_key = None
+    with os.scandir(EXTRACTED_DATA_DIR) as it:
+        for entry in it:
+            name = entry.name
+            if not name.endswith('.json') or 'ERROR' in name:
+                continue
+            if name == exact:
+                key = (-1, name)
+            elif name.startswith(prefix):
+                suffix = name[len(prefix):-5]
+                key = (int(suffix) if suffix.isdigit() else -1, name)
+            else:
+                continue
+            if best_key is None or key > best_key:
+                best, best_key = entry, key
+        if best is None:
+            raise FileNotFoundError(f"No extracted data for {deal_id}")
+        # DirEntry.stat() has to run while the scandir handle is open on Windows
+        st = best.stat()
+    return best.path, st.st_mtime_ns, st.st_size
+
+
+# Parsed + normalized file contents keyed by (path, mtime_ns, size), so a directory change
+# caused by another deal only costs the scan above, not a re-parse of this deal's file
+@lru_cache(maxsize=256)
+def _read_extracted_file(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    data = normalize_extracted_data(data)
+    
+    log.info("📂 Loaded: %s", os.path.basename(path))
+    return data
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
+@lru_cache(maxsize=1)
 def _build_extraction_prompt() -> str:
     """
     Build the system prompt for financial extraction.
     This tells the LLM exactly what to extract and in what format.
     """
-    schema = get_extraction_schema()
-    
     return f"""You are an expert financial analyst AI specialized in extracting structured data from investment documents.
 
 Your task is to analyze OCR-extracted text from financial documents and extract key financial metrics into a structured JSON format.
@@ -928,7 +1134,7 @@ Your task is to analyze OCR-extracted text from financial documents and extract
 **OUTPUT SCHEMA:**
 You must return data matching this exact structure:
 
-{json.dumps(schema, indent=2)}
+{_SCHEMA_JSON["extraction"]}
 
 **EXTRACTION GUIDELINES:**
 
@@ -1069,8 +1275,21 @@ def _normalize_extracted_data(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
     return extracted_data
 
 
+# Version marker stored as "_schema" on normalized output.
+# Bump whenever _normalize_extracted_data changes so older saved files are re-normalized on read.
+CURRENT_SCHEMA = 1
+
+
 def normalize_extracted_data(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
-    return _normalize_extracted_data(extracted_data)
+    """
+    Normalize and stamp with the current schema version, unless already stamped.
+    Legacy files and imports come out stamped too, so a re-save is never re-normalized.
+    """
+    if isinstance(extracted_data, dict) and extracted_data.get("_schema") == CURRENT_SCHEMA:
+        return extracted_data
+    normalized = _normalize_extracted_data(extracted_data)
+    normalized["_schema"] = CURRENT_SCHEMA
+    return normalized
 
 
 def _normalize_free_cash_flow(free_cash_flow: Any, extracted_data_root: Dict[str, Any]) -> Dict[str, Any]:
@@ -1144,40 +1363,9 @@ def _ensure_fcf_historical(
     profit = extracted_data_root.get("profit_metrics")
     profit = profit if isinstance(profit, dict) else {}
 
-    def collect_period_label_map(items: Any) -> Dict[int, str]:
-        out: Dict[int, str] = {}
-        if not isinstance(items, list):
-            return out
-        for item in items:
-            if not isinstance(item, dict):
-                continue
-            period = item.get("period")
-            y = _parse_year_int(str(period))
-            if y is None:
-                continue
-            out.setdefault(y, str(period))
-        return out
-
-    def collect_tale_year_label_map(metric_key: str) -> Dict[int, str]:
-        tale = extracted_data_root.get("tale_of_the_tape")
-        if not isinstance(tale, dict):
-            return {}
-        metric = tale.get(metric_key)
-        if not isinstance(metric, dict):
-            return {}
-        year_wise = metric.get("year_wise")
-        if not isinstance(year_wise, dict):
-            return {}
-        out: Dict[int, str] = {}
-        for label in year_wise.keys():
-            y = _parse_year_int(str(label))
-            if y is None:
-                continue
-            out.setdefault(y, str(label))
-        return out
-
+    # Label map and direct values in one pass over the FCF items
     fcf_items = profit.get("free_cash_flow")
-    fcf_label_map = collect_period_label_map(fcf_items)
+    fcf_label_map: Dict[int, str] = {}
     for item in fcf_items if isinstance(fcf_items, list) else []:
         if not isinstance(item, dict):
             continue
@@ -1185,6 +1373,7 @@ def _ensure_fcf_historical(
         y = _parse_year_int(str(period))
         if y is None:
             continue
+        fcf_label_map.setdefault(y, str(period))
         v = item.get("value")
         if v is None:
             continue
@@ -1198,13 +1387,14 @@ def _ensure_fcf_historical(
             "method": "direct"
         }
 
-    ocf_points = _collect_profit_metric_points(extracted_data_root, "operating_cash_flow")
-    capex_points = _collect_tale_metric_points(extracted_data_root, "capex")
+    points = _collect_all_points(extracted_data_root, ("operating_cash_flow",), ("capex",))
+    ocf_points = points["operating_cash_flow"]
+    capex_points = points["capex"]
     if ocf_points and capex_points:
         ocf_by_year = {y: v for y, v in ocf_points}
         capex_by_year = {y: v for y, v in capex_points}
-        ocf_label_map = collect_period_label_map(profit.get("operating_cash_flow"))
-        capex_label_map = collect_tale_year_label_map("capex")
+        ocf_label_map = _period_label_map(profit.get("operating_cash_flow"))
+        capex_label_map = _tale_year_label_map(extracted_data_root, "capex")
 
         years = sorted(set(ocf_by_year.keys()) & set(capex_by_year.keys()))
         for y in years:
@@ -1231,6 +1421,42 @@ def _ensure_fcf_historical(
     return normalized_fcf
 
 
+def _period_label_map(items: Any) -> Dict[int, str]:
+    """Year -> first period label seen, over a list of {"period": ..., "value": ...} items"""
+    out: Dict[int, str] = {}
+    if not isinstance(items, list):
+        return out
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        period = item.get("period")
+        y = _parse_year_int(str(period))
+        if y is None:
+            continue
+        out.setdefault(y, str(period))
+    return out
+
+
+def _tale_year_label_map(extracted_data_root: Dict[str, Any], metric_key: str) -> Dict[int, str]:
+    """Year -> first year_wise label seen, for one tale_of_the_tape metric"""
+    tale = extracted_data_root.get("tale_of_the_tape")
+    if not isinstance(tale, dict):
+        return {}
+    metric = tale.get(metric_key)
+    if not isinstance(metric, dict):
+        return {}
+    year_wise = metric.get("year_wise")
+    if not isinstance(year_wise, dict):
+        return {}
+    out: Dict[int, str] = {}
+    for label in year_wise.keys():
+        y = _parse_year_int(str(label))
+        if y is None:
+            continue
+        out.setdefault(y, str(label))
+    return out
+
+
 def _ensure_fcf_forecast(
     normalized_fcf: Dict[str, Any],
     extracted_data_root: Dict[str, Any]
@@ -1348,9 +1574,10 @@ def _ensure_fcf_forecast(
             normalized_fcf["forecast_next_5_years"] = forecast
             return normalized_fcf
 
-    ebitda_points = _collect_profit_metric_points(extracted_data_root, "ebitda")
-    capex_points = _collect_tale_metric_points(extracted_data_root, "capex")
-    wc_points = _collect_tale_metric_points(extracted_data_root, "change_in_working_capital")
+    points = _collect_all_points(extracted_data_root, ("ebitda",), ("capex", "change_in_working_capital"))
+    ebitda_points = points["ebitda"]
+    capex_points = points["capex"]
+    wc_points = points["change_in_working_capital"]
 
     if ebitda_points and capex_points:
         ebitda_by_year = {y: v for y, v in ebitda_points}
@@ -1449,50 +1676,52 @@ def _collect_revenue_points(extracted_data_root: Dict[str, Any]) -> List[tuple]:
     return sorted(points.items(), key=lambda x: x[0])
 
 
-def _collect_profit_metric_points(extracted_data_root: Dict[str, Any], metric_key: str) -> List[tuple]:
-    profit = extracted_data_root.get("profit_metrics")
-    if not isinstance(profit, dict):
-        return []
-    items = profit.get(metric_key)
-    if not isinstance(items, list):
-        return []
-
-    points: Dict[int, float] = {}
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        y = _parse_year_int(str(item.get("period")))
-        v = _parse_number(item.get("value"))
-        if y is None or v is None:
-            continue
-        points.setdefault(y, float(v))
-    return sorted(points.items(), key=lambda x: x[0])
+def _collect_all_points(
+    extracted_data_root: Dict[str, Any],
+    profit_keys: tuple = (),
+    tale_keys: tuple = ()
+) -> Dict[str, List[tuple]]:
+    """
+    Sorted (year, value) points for several profit_metrics lists and tale_of_the_tape
+    year_wise maps at once: each container is looked up and type-checked a single time.
+    """
+    points: Dict[str, List[tuple]] = {}
 
+    profit = extracted_data_root.get("profit_metrics") if profit_keys else None
+    profit = profit if isinstance(profit, dict) else {}
+    for metric_key in profit_keys:
+        items = profit.get(metric_key)
+        by_year: Dict[int, float] = {}
+        for item in items if isinstance(items, list) else ():
+            if not isinstance(item, dict):
+                continue
+            y = _parse_year_int(str(item.get("period")))
+            v = _parse_number(item.get("value"))
+            if y is None or v is None:
+                continue
+            by_year.setdefault(y, float(v))
+        points[metric_key] = sorted(by_year.items(), key=lambda x: x[0])
 
-def _collect_tale_metric_points(extracted_data_root: Dict[str, Any], metric_key: str) -> List[tuple]:
-    tale = extracted_data_root.get("tale_of_the_tape")
-    if not isinstance(tale, dict):
-        return []
-    metric = tale.get(metric_key)
-    if not isinstance(metric, dict):
-        return []
-    year_wise = metric.get("year_wise")
-    if not isinstance(year_wise, dict):
-        return []
+    tale = extracted_data_root.get("tale_of_the_tape") if tale_keys else None
+    tale = tale if isinstance(tale, dict) else {}
+    for metric_key in tale_keys:
+        metric = tale.get(metric_key)
+        year_wise = metric.get("year_wise") if isinstance(metric, dict) else None
+        by_year = {}
+        for year_label, obj in year_wise.items() if isinstance(year_wise, dict) else ():
+            y = _parse_year_int(str(year_label))
+            if y is None:
+                continue
+            if isinstance(obj, dict):
+                v = _parse_number(obj.get("value"))
+            else:
+                v = _parse_number(obj)
+            if v is None:
+                continue
+            by_year.setdefault(y, float(v))
+        points[metric_key] = sorted(by_year.items(), key=lambda x: x[0])
 
-    points: Dict[int, float] = {}
-    for year_label, obj in year_wise.items():
-        y = _parse_year_int(str(year_label))
-        if y is None:
-            continue
-        if isinstance(obj, dict):
-            v = _parse_number(obj.get("value"))
-        else:
-            v = _parse_number(obj)
-        if v is None:
-            continue
-        points.setdefault(y, float(v))
-    return sorted(points.items(), key=lambda x: x[0])
+    return points
 
 
 def _pick_base_year_int_from_revenue(
@@ -1602,17 +1831,20 @@ def _max_abs_yoy(points: List[tuple]) -> Optional[float]:
     return max(abs(x) for x in yoys)
 
 
+# Period labels repeat within and across documents ("FY2023", "2024E", ...) and each is
+# looked up by several of the collectors above
+@lru_cache(maxsize=4096)
 def _parse_year_int(label: str) -> Optional[int]:
     if not label:
         return None
-    m = re.search(r"(19\d{2}|20\d{2})", label)
+    m = _YEAR_4_RE.search(label)
     if m:
         return int(m.group(1))
-    m2 = re.search(r"-(\d{2})\b", label)
+    m2 = _YEAR_SUFFIX_RE.search(label)
     if m2:
         yy = int(m2.group(1))
         return 2000 + yy if yy <= 50 else 1900 + yy
-    m3 = re.search(r"\bFY\s?(\d{2})(?!\d)", label, re.IGNORECASE)
+    m3 = _FY_YEAR_RE.search(label)
     if m3:
         yy = int(m3.group(1))
         return 2000 + yy if yy <= 50 else 1900 + yy
@@ -1632,7 +1864,10 @@ def _parse_number(value: Any) -> Optional[float]:
         neg = True
         s = s[1:-1]
     s = s.replace(",", "")
-    s = re.sub(r"[^0-9.\-]", "", s)
+    if s.isascii() and s.isdigit():
+        # Plain integer strings (most table cells) need no regex cleanup
+        return -float(s) if neg else float(s)
+    s = _NON_NUMERIC_RE.sub("", s)
     if s in ("", "-", "."):
         return None
     try:
@@ -1719,37 +1954,52 @@ def _parse_json_safely(content: str) -> Dict[str, Any]:
     """
     Parse JSON from LLM response, handling potential markdown wrapping.
     """
+    # Fast path: JSON mode usually returns a bare object
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        pass
+
     # Remove markdown code blocks if present
-    cleaned = re.sub(r'^```json\s*', '', content.strip(), flags=re.MULTILINE)
-    cleaned = re.sub(r'\s*```$', '', cleaned, flags=re.MULTILINE)
-    cleaned = re.sub(r'^```\s*', '', cleaned, flags=re.MULTILINE)
+    cleaned = _FENCE_JSON_OPEN_RE.sub('', content.strip())
+    cleaned = _FENCE_CLOSE_RE.sub('', cleaned)
+    cleaned = _FENCE_OPEN_RE.sub('', cleaned)
     
     # Remove <think> tags if present (common in reasoning models)
-    cleaned = re.sub(r'<think>.*?</think>', '', cleaned, flags=re.DOTALL)
+    cleaned = _THINK_RE.sub('', cleaned)
     
-    return json.loads(cleaned)
+    try:
+        return orjson.loads(cleaned)
+    except orjson.JSONDecodeError:
+        # stdlib also accepts NaN/Infinity, which orjson rejects; it raises the same error type
+        return json.loads(cleaned)
 
 
 def _log_extraction_summary(data: Dict[str, Any]):
     """
-    Print a summary of what was extracted.
+    Log a summary of what was extracted.
     """
-    print(f"\n📊 Extraction Summary:")
-    print(f"   Company: {data.get('company_name', 'N/A')}")
-    print(f"   Currency: {data.get('currency', 'N/A')}")
+    if not log.isEnabledFor(logging.INFO):
+        return
+
+    lines = [
+        "📊 Extraction Summary:",
+        f"   Company: {data.get('company_name', 'N/A')}",
+        f"   Currency: {data.get('currency', 'N/A')}",
+    ]
     
     revenue = data.get('revenue', {})
     if revenue.get('present'):
-        print(f"   Current Revenue: {revenue['present'].get('value')} ({revenue['present'].get('period')})")
+        lines.append(f"   Current Revenue: {revenue['present'].get('value')} ({revenue['present'].get('period')})")
     
     profit = data.get('profit_metrics', {})
     ebitda = profit.get('ebitda', []) or profit.get('adjusted_ebitda', [])
     if ebitda:
-        print(f"   EBITDA entries: {len(ebitda)}")
+        lines.append(f"   EBITDA entries: {len(ebitda)}")
     
     market = data.get('market_intelligence', {})
     if market.get('industry_position'):
-        print(f"   Industry Position: {market['industry_position']}")
+        lines.append(f"   Industry Position: {market['industry_position']}")
     
     risks = data.get('risk_analysis', {})
     total_risks = sum([
@@ -1758,39 +2008,49 @@ def _log_extraction_summary(data: Dict[str, Any]):
         len(risks.get('market_risks', [])),
         len(risks.get('regulatory_risks', []))
     ])
-    print(f"   Total Risks: {total_risks}")
+    lines.append(f"   Total Risks: {total_risks}")
     
     ai = data.get('ai_suggestion', {})
     if ai.get('recommendation'):
-        print(f"   AI Recommendation: {ai['recommendation']} ({ai.get('confidence_percent', 0)}% confidence)")
+        lines.append(f"   AI Recommendation: {ai['recommendation']} ({ai.get('confidence_percent', 0)}% confidence)")
+
+    log.info("\n".join(lines))
+
+
+# Error logs are written off the calling thread, in order; pending writes finish at exit
+_ERROR_LOG_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='error-log')
 
 
 def _save_error_log(deal_id: str, error_message: str, error_type: str):
     """
-    Save error details to file for debugging.
+    Save error details to file for debugging (queued; returns immediately).
     """
+    timestamp = int(time.time())
+    error_data = {
+        "error": True,
+        "error_type": error_type,
+        "message": error_message,
+        "timestamp": timestamp,
+        "deal_id": deal_id
+    }
+    # ns timestamp + error type: concurrent failures for a deal must not share a file
+    filename = f"{deal_id}_ERROR_{error_type}_{time.time_ns()}.json"
+    _ERROR_LOG_WRITER.submit(_write_error_log, filename, error_data)
+
+
+def _write_error_log(filename: str, error_data: Dict[str, Any]):
     try:
-        timestamp = int(time.time())
-        filename = f"{deal_id}_ERROR_{timestamp}.json"
-        filepath = os.path.join(EXTRACTED_DATA_DIR, filename)
+        filepath = EXTRACTED_DATA_DIR / filename
         
-        error_data = {
-            "error": True,
-            "error_type": error_type,
-            "message": error_message,
-            "timestamp": timestamp,
-            "deal_id": deal_id
-        }
+        ensure_dir(EXTRACTED_DATA_DIR)
         
-        os.makedirs(EXTRACTED_DATA_DIR, exist_ok=True)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(error_data, option=orjson.OPT_INDENT_2))
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(error_data, f, indent=2)
-        
-        print(f"🚨 Error log saved: {filename}")
+        log.error("🚨 Error log saved: %s", filename)
         
     except Exception as e:
-        print(f"❌ Could not save error log: {e}")
+        log.error("❌ Could not save error log: %s", e)
 
 
 # ============================================================================
@@ -1816,32 +2076,22 @@ def get_extraction_status(deal_id: str) -> Dict[str, Any]:
 
 
 def _extract_transaction_assumptions_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": _build_transaction_assumptions_prompt()},
-                {"role": "user", "content": f"Extract transaction assumptions from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_transaction_assumptions_prompt(), "Extract transaction assumptions from this OCR text", ocr_text)
         )
     except Exception as e:
         error_msg = f"Transaction Assumptions API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        log.error("❌ %s", error_msg)
         if deal_id:
             _save_error_log(deal_id, error_msg, "TA_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     if not raw_content:
         raise ValueError("TA-only LLM returned empty response")
 
@@ -1851,8 +2101,9 @@ def _extract_transaction_assumptions_separately(
     return ta_only
 
 
+@lru_cache(maxsize=1)
 def _build_transaction_assumptions_prompt() -> str:
-    ta_schema = json.dumps(get_transaction_assumptions_schema(), indent=2)
+    ta_schema = _SCHEMA_JSON["transaction_assumptions"]
     return f"""
 You are an expert investment banking operations assistant.
 
@@ -1877,17 +2128,37 @@ Return ONLY valid JSON.
 """
 
 def _extract_interest_schedule_separately(
-    client: OpenAI,
+    client: "OpenAI",
     ocr_text: str,
     deal_id: Optional[str] = None
 ) -> Dict[str, Any]:
-    if len(ocr_text) > MAX_OCR_CHARS:
-        ocr_text = ocr_text[:MAX_OCR_CHARS]
-
     try:
-        from .schema import get_interest_schedule_schema
-        is_schema = json.dumps(get_interest_schedule_schema(), indent=2)
-        system_prompt = f"""You are an expert financial extraction assistant.
+        system_prompt = _build_interest_schedule_prompt()
+        raw_content = _chat_completion(
+            client,
+            _document_messages(system_prompt, "Extract the interest schedule from this OCR text", ocr_text),
+            temperature=0.0
+        )
+    except Exception as e:
+        error_msg = f"Interest Schedule API call failed: {str(e)}"
+        log.error("❌ %s", error_msg)
+        if deal_id:
+            _save_error_log(deal_id, error_msg, "IS_API_FAILURE")
+        raise
+
+    if not raw_content:
+        raise ValueError("IS-only LLM returned empty response")
+
+    is_only = _parse_json_safely(raw_content)
+    if not isinstance(is_only, dict):
+        raise ValueError("IS-only LLM returned non-object JSON")
+    return is_only
+
+
+@lru_cache(maxsize=1)
+def _build_interest_schedule_prompt() -> str:
+    is_schema = _SCHEMA_JSON["interest_schedule"]
+    return f"""You are an expert financial extraction assistant.
 Task: Extract the precise Interest Schedule (Revolver Interest, Term Loan Interest, Seller Note Interest, Interest Subtotal) from the OCR text.
 Do not hallucinate. Do not recalculate if not present. Just extract values for historical/current years.
 
@@ -1902,28 +2173,283 @@ Rules:
 Map these to the exact years found (e.g. {{"2022": 5.0, "2023": 6.5}}). If any specific breakdown is missing, return empty object {{}}.
 Return ONLY valid JSON.
 """
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Extract the interest schedule from this OCR text:\n\n{ocr_text}"},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.0,
-            max_tokens=MAX_TOKENS
+
+
+# ============================================================================
+# SUB-EXTRACTION DISPATCH
+# ============================================================================
+
+# Section name -> separate extractor / prompt builder, in merge order
+_SUBSECTION_EXTRACTORS = (
+    ("capex", _extract_capex_separately),
+    ("change_in_working_capital", _extract_change_in_working_capital_separately),
+    ("free_cash_flow", _extract_free_cash_flow_separately),
+    ("balance_sheet", _extract_balance_sheet_separately),
+    ("debt_profile", _extract_debt_profile_separately),
+    ("transaction_assumptions", _extract_transaction_assumptions_separately),
+    ("interest_schedule", _extract_interest_schedule_separately),
+)
+_SUBSECTION_PROMPTS = (
+    ("capex", _build_capex_prompt),
+    ("change_in_working_capital", _build_change_in_working_capital_prompt),
+    ("free_cash_flow", _build_free_cash_flow_prompt),
+    ("balance_sheet", _build_balance_sheet_prompt),
+    ("debt_profile", _build_debt_profile_prompt),
+    ("transaction_assumptions", _build_transaction_assumptions_prompt),
+    ("interest_schedule", _build_interest_schedule_prompt),
+)
+
+
+def _submit_subsections(
+    client: "OpenAI",
+    ocr_text: str,
+    deal_id: Optional[str] = None,
+    names: Optional[List[str]] = None
+) -> Dict[str, Future]:
+    """Start the named sub-extractions (default: all) on _LLM_POOL; section name -> future"""
+    if names is None:
+        names = [name for name, _ in _SUBSECTION_EXTRACTORS]
+    if not names:
+        return {}
+    futures: Dict[str, Future] = {}
+    absent = []
+    for name in names:
+        gate = _SECTION_GATES_RE.get(name)
+        if gate is not None and not gate.search(ocr_text):
+            # Nothing to merge: an empty result keeps whatever the main response has
+            futures[name] = _completed_section(name, {})
+            absent.append(name)
+    if absent:
+        log.info("✓ No %s terms in the document; skipping those sub-extractions", absent)
+    wanted = [name for name in names if name not in futures]
+    if not wanted:
+        return futures
+
+    if LLM_COMBINED_SUBSECTIONS:
+        # Prompt section order is fixed, so the same subset always builds the same prompt
+        requested = tuple(name for name, _ in _SUBSECTION_PROMPTS if name in wanted)
+        combined = _LLM_POOL.submit(
+            _extract_subsections_combined, client=client, ocr_text=ocr_text, deal_id=deal_id, names=requested
+        )
+        futures.update((name, combined) for name in wanted)
+        return futures
+
+    extractors = dict(_SUBSECTION_EXTRACTORS)
+    # Slicing would break the identical OCR prefix that LLM_SHARED_PREFIX is for
+    slice_text = LLM_SECTION_SLICES and not LLM_SHARED_PREFIX
+    for name in wanted:
+        futures[name] = _LLM_POOL.submit(
+            extractors[name],
+            client=client,
+            ocr_text=_section_text(name, ocr_text) if slice_text else ocr_text,
+            deal_id=deal_id
+        )
+    return futures
+
+
+# Sections that cannot be in a document mentioning none of these terms (e.g. a short
+# teaser); their sub-extraction is skipped outright
+_SECTION_GATES_RE = {
+    "balance_sheet": re.compile(r"balance sheet|total assets", re.IGNORECASE),
+    "debt_profile": re.compile(
+        r"term loans?|revolver|credit facilit(?:y|ies)|senior notes",
+        re.IGNORECASE
+    ),
+    "interest_schedule": re.compile(
+        r"interest (?:expense|rate)s?|term loans?|revolver|credit facilit(?:y|ies)|senior notes",
+        re.IGNORECASE
+    ),
+}
+
+
+# Section name -> where its figures live in a document. Sections not listed here (FCF,
+# transaction assumptions) draw on revenue/EBITDA from anywhere and always get the full text.
+_SECTION_KEYWORDS_RE = {
+    "capex": re.compile(
+        r"capital expenditure|capex|PP&E|purchases? of property|additions to (?:fixed|property)",
+        re.IGNORECASE
+    ),
+    "change_in_working_capital": re.compile(
+        r"working capital|accounts receivable|accounts payable|inventor(?:y|ies)",
+        re.IGNORECASE
+    ),
+    "balance_sheet": re.compile(
+        r"balance sheet|total assets|current liabilities|(?:share|stock)holders'? equity",
+        re.IGNORECASE
+    ),
+    "debt_profile": re.compile(
+        r"term loan|revolv|credit facilit|senior (?:secured )?notes|borrowings|indebtedness",
+        re.IGNORECASE
+    ),
+    "interest_schedule": re.compile(
+        r"interest (?:expense|rate|schedule)|term loan|revolv|credit facilit|SOFR|LIBOR",
+        re.IGNORECASE
+    ),
+}
+# Context kept around each keyword hit; tables follow their headings, so mostly after
+_SLICE_BEFORE = 500
+_SLICE_AFTER = 3000
+_SLICE_MAX_CHARS = MAX_OCR_CHARS // 4
+
+
+def _section_text(name: str, ocr_text: str) -> str:
+    """
+    The parts of ocr_text around name's keywords, at most _SLICE_MAX_CHARS.
+    Falls back to the full text when the section has no keywords or none are found.
+    """
+    pattern = _SECTION_KEYWORDS_RE.get(name)
+    if pattern is None or len(ocr_text) <= _SLICE_MAX_CHARS:
+        return ocr_text
+
+    spans: List[List[int]] = []
+    for m in pattern.finditer(ocr_text):
+        start, end = max(0, m.start() - _SLICE_BEFORE), m.end() + _SLICE_AFTER
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    if not spans:
+        return ocr_text
+
+    parts: List[str] = []
+    remaining = _SLICE_MAX_CHARS
+    for start, end in spans:
+        part = ocr_text[start:end][:remaining]
+        parts.append(part)
+        remaining -= len(part)
+        if remaining <= 0:
+            break
+    return "\n...\n".join(parts)
+
+
+# Section name -> (path of the section in extracted data, path of its values within it, values are year-wise entries)
+_SECTION_PATHS = {
+    "capex": (("tale_of_the_tape", "capex"), ("year_wise",), True),
+    "change_in_working_capital": (("tale_of_the_tape", "change_in_working_capital"), ("year_wise",), True),
+    "free_cash_flow": (("free_cash_flow",), ("historical",), True),
+    "balance_sheet": (("balance_sheet",), (), False),
+    "debt_profile": (("debt_profile",), (), False),
+    "transaction_assumptions": (("transaction_assumptions",), (), False),
+    "interest_schedule": (("interest_schedule",), (), False),
+}
+_EMPTY_VALUES = ("", "-", "n/a", "null", "none")
+
+
+def _has_values(obj: Any) -> bool:
+    """True if obj holds at least one real (non-null, non-placeholder) leaf value"""
+    if isinstance(obj, dict):
+        return any(_has_values(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_values(v) for v in obj)
+    if isinstance(obj, str):
+        return obj.strip().lower() not in _EMPTY_VALUES
+    return obj is not None
+
+
+def _present_section(extracted_data: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    """
+    The main response's copy of a sub-extraction section, shaped like that sub-extraction's
+    own JSON (e.g. {"tale_of_the_tape": {"capex": ...}}), or None if it has no real values.
+    """
+    section_path, values_path, year_wise = _SECTION_PATHS[name]
+    section = extracted_data
+    for key in section_path:
+        section = section.get(key) if isinstance(section, dict) else None
+    if not isinstance(section, dict):
+        return None
+
+    values = section
+    for key in values_path:
+        values = values.get(key) if isinstance(values, dict) else None
+    if year_wise:
+        if not isinstance(values, dict):
+            return None
+        values = [v.get("value") if isinstance(v, dict) else v for v in values.values()]
+    if not _has_values(values):
+        return None
+
+    shaped = section
+    for key in reversed(section_path):
+        shaped = {key: shaped}
+    return shaped
+
+
+def _completed_section(name: str, section: Dict[str, Any]) -> Future:
+    """A finished future holding `section`, in the form _section_result expects"""
+    future = Future()
+    future.set_result({name: section} if LLM_COMBINED_SUBSECTIONS else section)
+    return future
+
+
+def _section_result(sub_results: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """
+    One sub-extraction's result, shaped like its separate call's JSON.
+    With LLM_COMBINED_SUBSECTIONS every name shares one future holding all sections.
+    """
+    result = sub_results[name].result()
+    if LLM_COMBINED_SUBSECTIONS:
+        result = result.get(name)
+        if not isinstance(result, dict):
+            raise ValueError(f"Combined sub-extraction response has no '{name}' section")
+    return result
+
+
+# Sub-extractions whose separate call uses the MAX_TOKENS_SMALL response budget
+_SMALL_SUBSECTIONS = frozenset({"capex", "change_in_working_capital", "debt_profile"})
+
+
+@lru_cache(maxsize=None)
+def _build_combined_subsections_prompt(names: Tuple[str, ...]) -> str:
+    """The multi-section prompt for `names` (in _SUBSECTION_PROMPTS order)"""
+    builders = dict(_SUBSECTION_PROMPTS)
+    keys = ", ".join(f'"{name}"' for name in names)
+    sections = "\n\n".join(
+        f"### SECTION \"{name}\"\n{builders[name]().strip()}" for name in names
+    )
+    return f"""You are a financial data extraction assistant.
+
+Several independent extraction tasks follow, one per SECTION, each with its own schema and rules.
+Complete every task against the same OCR text.
+
+Return ONLY one valid JSON object with exactly these top-level keys: {keys}.
+The value under each key must be the complete JSON object that its SECTION asks for,
+including that section's own top-level key (e.g. "capex" -> {{"tale_of_the_tape": {{"capex": ...}}}}).
+
+{sections}
+"""
+
+
+def _extract_subsections_combined(
+    client: "OpenAI",
+    ocr_text: str,
+    deal_id: Optional[str] = None,
+    names: Optional[Tuple[str, ...]] = None
+) -> Dict[str, Any]:
+    """The named sub-extractions (default: all) in one LLM call, so the OCR text is sent and prefilled once"""
+    if names is None:
+        names = tuple(name for name, _ in _SUBSECTION_PROMPTS)
+    # Each section's own separate-call budget, within the configured cap
+    max_tokens = min(
+        sum(MAX_TOKENS_SMALL if name in _SMALL_SUBSECTIONS else MAX_TOKENS for name in names),
+        LLM_MAX_OUTPUT_TOKENS
+    )
+    try:
+        raw_content = _chat_completion(
+            client,
+            _document_messages(_build_combined_subsections_prompt(names), "Complete every section from this OCR text", ocr_text),
+            max_tokens=max_tokens
         )
     except Exception as e:
-        error_msg = f"Interest Schedule API call failed: {str(e)}"
-        print(f"❌ {error_msg}")
+        error_msg = f"Combined sub-extraction API call failed: {str(e)}"
+        log.error("❌ %s", error_msg)
         if deal_id:
-            _save_error_log(deal_id, error_msg, "IS_API_FAILURE")
+            _save_error_log(deal_id, error_msg, "SUBSECTIONS_API_FAILURE")
         raise
 
-    raw_content = response.choices[0].message.content
     if not raw_content:
-        raise ValueError("IS-only LLM returned empty response")
+        raise ValueError("Combined sub-extraction LLM returned empty response")
 
-    is_only = _parse_json_safely(raw_content)
-    if not isinstance(is_only, dict):
-        raise ValueError("IS-only LLM returned non-object JSON")
-    return is_only
+    combined = _parse_json_safely(raw_content)
+    if not isinstance(combined, dict):
+        raise ValueError("Combined sub-extraction LLM returned non-object JSON")
+    return combined
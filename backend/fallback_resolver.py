@@ -1,6 +1,22 @@
+import logging
 import re
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+log = logging.getLogger(__name__)
+
+_YEAR_RE = re.compile(r'\d{2,4}')
+
+
+@lru_cache(maxsize=256)
+def _metric_pattern(metric_name: str, year: str) -> "re.Pattern":
+    """Narrative-style "<metric> ... <year> ... $<number>" pattern, compiled once per (metric, year)"""
+    # Example: look for "ebitda" followed by some text (up to 200 chars),
+    # followed by the year, followed by a number.
+    term = metric_name.lower().replace(" ", r"\s*")
+    return re.compile(rf"{term}[\s\w\.\,]{{0,100}}{year}[\s\w]{{0,30}}\$?([\d\,\.]+)")
+
+
 class FallbackResolver:
     """
     A 4-step safety net to ensure Extracted JSON data is complete and mathematically sound.
@@ -18,7 +34,7 @@ class FallbackResolver:
         self.raw_text = ocr_text
 
     def apply_resolution(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
-        print("\n🛡️  Running Fallback Resolver Layer...")
+        log.info("🛡️  Running Fallback Resolver Layer...")
         
         data = dict(extracted_data)
         
@@ -37,7 +53,7 @@ class FallbackResolver:
         data["profit_metrics"] = profit_metrics
         data["revenue"] = revenue
         
-        print("🛡️  Fallback Resolution Complete.")
+        log.info("🛡️  Fallback Resolution Complete.")
         return data
 
     def _resolve_revenue(self, revenue_data: Dict[str, Any]):
@@ -80,17 +96,17 @@ class FallbackResolver:
             if e_val is None and g_val is not None and o_val is not None:
                 # OpEx is often negative. EBITDA = GP + OpEx (if OpEx is negative) or GP - OpEx
                 e_val = g_val - abs(o_val)
-                print(f"   [Math Derivation] Derived EBITDA for {p} = {e_val}")
+                log.debug("[Math Derivation] Derived EBITDA for %s = %s", p, e_val)
                 
             # 3. OpEx = GP - EBITDA (Accounting plug)
             if o_val is None and g_val is not None and e_val is not None:
                 o_val = -(g_val - e_val) # OpEx is traditionally negative
-                print(f"   [Math Derivation] Derived OpEx for {p} = {o_val}")
+                log.debug("[Math Derivation] Derived OpEx for %s = %s", p, o_val)
                 
             # 4. GP = EBITDA + OpEx (If GP is missing)
             if g_val is None and e_val is not None and o_val is not None:
                 g_val = e_val + abs(o_val)
-                print(f"   [Math Derivation] Derived Gross Profit for {p} = {g_val}")
+                log.debug("[Math Derivation] Derived Gross Profit for %s = %s", p, g_val)
 
             # Rebuild individual metrics with safe defaults if all else fails
             new_gp.append({"period": p, "value": g_val if g_val is not None else "N/A"})
@@ -128,18 +144,18 @@ class FallbackResolver:
         if val is not None and val != "null" and str(val).strip() != "":
             return # Healthy
             
-        print(f"   [AI Check Failed] Missing {metric_name} for period {period}. Attempting regex recovery...")
+        log.debug("[AI Check Failed] Missing %s for period %s. Attempting regex recovery...", metric_name, period)
         
         # Step 2: Regex OCR Extraction
         recovered_val = self._regex_search_metric(metric_name, period)
         if recovered_val is not None:
             item_dict["value"] = recovered_val
-            print(f"   [Regex OCR] Recovered {metric_name} for {period} = {recovered_val}")
+            log.debug("[Regex OCR] Recovered %s for %s = %s", metric_name, period, recovered_val)
             return
             
         # Step 4: Safe Default (Step 3 happens at the aggregate loop level)
         item_dict["value"] = "N/A"
-        print(f"   [Safe Default] Applied N/A to {metric_name} for {period}")
+        log.debug("[Safe Default] Applied N/A to %s for %s", metric_name, period)
 
     def _regex_search_metric(self, metric_name: str, period: str) -> Optional[float]:
         """
@@ -149,27 +165,21 @@ class FallbackResolver:
         if not period: return None
         
         # Extract just the year from "FY22A" -> "22" or "2022"
-        year_match = re.search(r'\d{2,4}', str(period))
+        year_match = _YEAR_RE.search(str(period))
         if not year_match: return None
         year = year_match.group(0)
         if len(year) == 2: year = "20" + year # Simple assumption for 2000s
         
-        # Build a flexible regex pattern. 
-        # Example: look for "ebitda" followed by some text (up to 200 chars), 
-        # followed by the year, followed by a number.
-        term = metric_name.lower().replace(" ", r"\s*")
-        
         # Pattern 1: Table row style: "Revenue 100 120 150" where columns are years.
         # This is extremely complex to reliably regex without coordinate data.
         
         # Pattern 2: Narrative style: "EBITDA in 2022 was $15.5M"
-        pattern = rf"{term}[\s\w\.\,]{{0,100}}{year}[\s\w]{{0,30}}\$?([\d\,\.]+)"
-        
         try:
-            matches = re.findall(pattern, self.ocr_text)
-            if matches:
+            # Only the first match is used, so stop scanning the OCR text there
+            match = _metric_pattern(metric_name, year).search(self.ocr_text)
+            if match:
                 # Take the first plausible number
-                raw_num = matches[0].replace(",", "")
+                raw_num = match.group(1).replace(",", "")
                 if raw_num.replace(".", "").isdigit():
                     return float(raw_num)
         except Exception:
@@ -1,6 +1,9 @@
 import os
 import io
+import logging
+import mmap
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from google.cloud import documentai
 from google.api_core.client_options import ClientOptions
@@ -12,12 +15,17 @@ load_dotenv()
 from openai import OpenAI
 from backend.config import LLM_API_KEY, LLM_MODEL, LLM_BASE_URL, MAX_OCR_CHARS, MAX_TOKENS, TEMPERATURE
 
+log = logging.getLogger(__name__)
+
 # Configuration
 PROJECT_ID = os.environ.get('GOOGLE_PROJECT_ID')
 LOCATION = os.environ.get('GOOGLE_LOCATION', 'us')
 PROCESSOR_ID = os.environ.get('GOOGLE_PROCESSOR_ID')
 CREDENTIALS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'credentials.json')
 
+# Concurrent Document AI requests per document (chunks are network-bound)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 4))
+
 # Set credentials explicitly
 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = CREDENTIALS_PATH
 
@@ -34,15 +42,31 @@ def process_document_chunk(client, processor_name, file_content, mime_type):
 
     return result.document.text
 
+def _as_stream(file_content):
+    """Wrap raw bytes in a BytesIO; mmap/file objects are already seekable streams"""
+    if hasattr(file_content, 'read'):
+        file_content.seek(0)
+        return file_content
+    return io.BytesIO(file_content)
+
 def extract_text_from_file(file_content, mime_type='application/pdf'):
     """
     Extract text from a file (PDF or Image).
+    Accepts raw bytes or a path on disk; paths are memory-mapped read-only
+    so the parsers read straight from the page cache.
     Tries Google Document AI first, falls back to PyPDF if credentials missing.
     Then applies the Deterministic Financial parsing logic.
     """
+    if isinstance(file_content, (str, os.PathLike)):
+        with open(file_content, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return extract_text_from_file(b'', mime_type)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return extract_text_from_file(mm, mime_type)
+
     # Check for credentials
     if not os.path.exists(CREDENTIALS_PATH):
-        print("⚠️ Google Cloud Credentials not found. Falling back to simple PDF extraction.")
+        log.warning("⚠️ Google Cloud Credentials not found. Falling back to simple PDF extraction.")
         return extract_text_fallback(file_content, mime_type)
 
     try:
@@ -51,13 +75,12 @@ def extract_text_from_file(file_content, mime_type='application/pdf'):
         client = documentai.DocumentProcessorServiceClient(client_options=client_options)
         processor_name = client.processor_path(PROJECT_ID, LOCATION, PROCESSOR_ID)
         
-        full_text = ""
-        
         # Check if PDF and split if necessary
         if mime_type == 'application/pdf':
-            pdf_reader = pypdf.PdfReader(io.BytesIO(file_content))
+            pdf_reader = pypdf.PdfReader(_as_stream(file_content))
             total_pages = len(pdf_reader.pages)
             chunk_size = 15
+            chunks = []
             
             for i in range(0, total_pages, chunk_size):
                 chunk_writer = pypdf.PdfWriter()
@@ -68,20 +91,26 @@ def extract_text_from_file(file_content, mime_type='application/pdf'):
                 
                 chunk_stream = io.BytesIO()
                 chunk_writer.write(chunk_stream)
-                chunk_content = chunk_stream.getvalue()
-                
-                # Process chunk
-                chunk_text = process_document_chunk(client, processor_name, chunk_content, mime_type)
-                full_text += chunk_text + "\n"
+                chunks.append(chunk_stream.getvalue())
+
+            # Process chunks concurrently; map() keeps page order
+            with ThreadPoolExecutor(max_workers=max(1, min(OCR_WORKERS, len(chunks)))) as ex:
+                chunk_texts = list(ex.map(
+                    lambda chunk_content: process_document_chunk(client, processor_name, chunk_content, mime_type),
+                    chunks
+                ))
+
+            # One join instead of re-copying the accumulated text per chunk
+            full_text = "".join(text + "\n" for text in chunk_texts)
         else:
             # Process non-PDF or single chunk if not PDF
-            full_text = process_document_chunk(client, processor_name, file_content, mime_type)
+            full_text = process_document_chunk(client, processor_name, bytes(file_content), mime_type)
             
         raw_text = full_text
 
     except Exception as e:
-        print(f"Error in OCR processing: {e}")
-        print("Attempting fallback extraction...")
+        log.error("❌ Error in OCR processing: %s", e)
+        log.info("Attempting fallback extraction...")
         raw_text = extract_text_fallback(file_content, mime_type)
 
     # -------------------------------------------------------------
@@ -96,10 +125,8 @@ def extract_text_fallback(file_content, mime_type):
     """Fallback text extraction using pypdf"""
     try:
         if mime_type == 'application/pdf':
-            pdf_reader = pypdf.PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            pdf_reader = pypdf.PdfReader(_as_stream(file_content))
+            text = "".join(page.extract_text() + "\n" for page in pdf_reader.pages)
             
             if not text.strip():
                 return "Error: Could not extract text from PDF. It might be a scanned image without OCR."
@@ -112,10 +139,10 @@ def extract_text_fallback(file_content, mime_type):
 def run_deterministic_parser(ocr_text: str) -> str:
     """Passes OCR text through a strict deterministic LLM prompt."""
     if not LLM_API_KEY:
-        print("⚠️ No LLM API key for deterministic parser.")
+        log.warning("⚠️ No LLM API key for deterministic parser.")
         return ""
         
-    print("🤖 Running Deterministic Financial Parser...")
+    log.info("🤖 Running Deterministic Financial Parser...")
     
     try:
         client_config = {"api_key": LLM_API_KEY}
@@ -256,9 +283,9 @@ If absolutely no financial data and no sections are found:
         )
         
         raw_content = response.choices[0].message.content
-        print("✓ Deterministic parse complete.")
+        log.info("✓ Deterministic parse complete.")
         return raw_content
         
     except Exception as e:
-        print(f"❌ Deterministic parser failed: {e}")
+        log.error("❌ Deterministic parser failed: %s", e)
         return ""
@@ -1,10 +1,58 @@
+import io
 import os
 import csv
 import time
 import json
 import re
 from typing import Any, Dict, Optional, Tuple, List
-from .config import REPORTS_DIR, get_excel_template_path
+from .config import REPORTS_DIR, ensure_dir, get_excel_template_path
+
+# Cell formats shared by every export; built once instead of per written cell
+MILLIONS_NUMBER_FORMAT = '"$"#,##0.0"M";[Red]("$"#,##0.0"M")'
+THOUSANDS_TO_MILLIONS_NUMBER_FORMAT = '"$"#,##0.0,"M";[Red]("$"#,##0.0,"M")'
+UNITS_TO_MILLIONS_NUMBER_FORMAT = '"$"#,##0.0,,"M";[Red]("$"#,##0.0,,"M")'
+EBITDA_NUMBER_FORMAT = '"$"#,##0.0;[Red]("$"#,##0.0)'
+
+# Template title placeholders replaced with the deal name -> case-insensitive pattern
+_TEMPLATE_PLACEHOLDERS = {
+    ph: re.compile(re.escape(ph), re.IGNORECASE)
+    for ph in (
+        "herff jones",
+        "company name",
+        "deal name",
+        "project name",
+        "client name",
+        "target name",
+        "[company name]",
+        "<company name>",
+        "manta ray",
+        "manta ray segmented balance sheet",
+    )
+}
+
+
+# Raw template workbook bytes: path -> (mtime_ns, bytes); re-read only when the file changes
+_TEMPLATE_CACHE: Dict[str, Tuple[int, bytes]] = {}
+
+
+def _template_bytes(template_path: str) -> bytes:
+    mtime = os.stat(template_path).st_mtime_ns
+    hit = _TEMPLATE_CACHE.get(template_path)
+    if hit is None or hit[0] != mtime:
+        with open(template_path, 'rb') as f:
+            hit = (mtime, f.read())
+        _TEMPLATE_CACHE[template_path] = hit
+    return hit[1]
+
+
+def _millions_format(template_scale: float) -> str:
+    """Number format that displays values in $M for a template in units of template_scale."""
+    if template_scale >= 1_000_000.0:
+        return MILLIONS_NUMBER_FORMAT
+    if template_scale >= 1_000.0:
+        return THOUSANDS_TO_MILLIONS_NUMBER_FORMAT
+    return UNITS_TO_MILLIONS_NUMBER_FORMAT
+
 
 def generate_csv_report(deal_id, deal_name, data):
     """
@@ -19,52 +67,59 @@ def generate_csv_report(deal_id, deal_name, data):
     # Clean deal name for filename
     safe_deal_name = "".join([c for c in deal_name if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
     filename = f"{safe_deal_name}_{deal_id}_Analysis_{timestamp}.csv"
-    filepath = os.path.join(REPORTS_DIR, filename)
+    filepath = os.path.join(ensure_dir(REPORTS_DIR), filename)
     
     # Define headers
     header = ["Category", "Metric", "Period", "Value", "Unit/Currency"]
     
-    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(header)
+    # Build the whole grid row-major, then write it in one writerows call
+    rows = [header]
+    
+    # 1. Revenue
+    revenue = data.get('revenue', {})
+    
+    # Present
+    present = revenue.get('present', {})
+    if present:
+        rows.append(["Revenue", "Present Revenue", present.get('period', 'N/A'), present.get('value', 'N/A'), ""])
         
-        # 1. Revenue
-        revenue = data.get('revenue', {})
+    # History
+    rows.extend(
+        ["Revenue", "Historical Revenue", item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')]
+        for item in revenue.get('history', [])
+    )
         
-        # Present
-        present = revenue.get('present', {})
-        if present:
-            writer.writerow(["Revenue", "Present Revenue", present.get('period', 'N/A'), present.get('value', 'N/A'), ""])
-            
-        # History
-        for item in revenue.get('history', []):
-            writer.writerow(["Revenue", "Historical Revenue", item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')])
-            
-        # Future
-        for item in revenue.get('future', []):
-            writer.writerow(["Revenue", "Projected Revenue", item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')])
+    # Future
+    rows.extend(
+        ["Revenue", "Projected Revenue", item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')]
+        for item in revenue.get('future', [])
+    )
+        
+    # 2. Profit Metrics
+    profit = data.get('profit_metrics', {})
+    for metric, items in profit.items():
+        metric_name = metric.replace('_', ' ').title()
+        rows.extend(
+            ["Profit Metrics", metric_name, item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')]
+            for item in items
+        )
             
-        # 2. Profit Metrics
-        profit = data.get('profit_metrics', {})
-        for metric, items in profit.items():
-            metric_name = metric.replace('_', ' ').title()
-            for item in items:
-                writer.writerow(["Profit Metrics", metric_name, item.get('period', 'N/A'), item.get('value', 'N/A'), item.get('unit', '')])
-                
-        # 3. Market Intelligence
-        market = data.get('market_intelligence', {})
-        if market.get('market_size'):
-             writer.writerow(["Market", "Market Size", "", market.get('market_size'), ""])
-        if market.get('industry_position'):
-             writer.writerow(["Market", "Industry Position", "", market.get('industry_position'), ""])
-             
-        # 4. Risks
-        risks = data.get('risk_analysis', {})
-        for r_type, items in risks.items():
-            if isinstance(items, list):
-                type_name = r_type.replace('_', ' ').title()
-                for item in items:
-                    writer.writerow(["Risk", type_name, "", item, ""])
+    # 3. Market Intelligence
+    market = data.get('market_intelligence', {})
+    if market.get('market_size'):
+        rows.append(["Market", "Market Size", "", market.get('market_size'), ""])
+    if market.get('industry_position'):
+        rows.append(["Market", "Industry Position", "", market.get('industry_position'), ""])
+         
+    # 4. Risks
+    risks = data.get('risk_analysis', {})
+    for r_type, items in risks.items():
+        if isinstance(items, list):
+            type_name = r_type.replace('_', ' ').title()
+            rows.extend(["Risk", type_name, "", item, ""] for item in items)
+    
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerows(rows)
         
     return filename
 
@@ -78,12 +133,13 @@ def generate_excel_report(deal_id: str, deal_name: str, data: Dict[str, Any], te
     timestamp = int(time.time())
     safe_deal_name = "".join([c for c in deal_name if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
     filename = f"{safe_deal_name}_{deal_id}_Model_{timestamp}.xlsm"
-    filepath = os.path.join(REPORTS_DIR, filename)
+    filepath = os.path.join(ensure_dir(REPORTS_DIR), filename)
 
     template_path = template_path or get_excel_template_path()
     # Load with data_only=True so openpyxl reads cached cell values, not formula strings.
     # This prevents #DIV/0! / formula strings from leaking into our output.
-    wb = load_workbook(template_path, keep_vba=True, data_only=True)
+    # Each export parses a fresh workbook from the cached bytes, since the fill mutates it.
+    wb = load_workbook(io.BytesIO(_template_bytes(template_path)), keep_vba=True, data_only=True)
 
     updated_any = False
     base_year = _infer_base_year(data)
@@ -643,13 +699,7 @@ def _write_fcf_model_to_excel(
             else:
                 cell.value = v
                 if template_scale is not None:
-                    if template_scale >= 1_000_000.0:
-                        fmt = '"$"#,##0.0"M";[Red]("$"#,##0.0"M")'
-                    elif template_scale >= 1_000.0:
-                        fmt = '"$"#,##0.0,"M";[Red]("$"#,##0.0,"M")'
-                    else:
-                        fmt = '"$"#,##0.0,,"M";[Red]("$"#,##0.0,,"M")'
-                    cell.number_format = fmt
+                    cell.number_format = _millions_format(template_scale)
 
 
 def _update_template_header(ws, deal_name: str, currency: Any) -> None:
@@ -657,42 +707,25 @@ def _update_template_header(ws, deal_name: str, currency: Any) -> None:
     if not deal_name:
         return
 
-    target_placeholders = {
-        "herff jones",
-        "company name",
-        "deal name",
-        "project name",
-        "client name",
-        "target name",
-        "[company name]",
-        "<company name>",
-        "manta ray",
-        "manta ray segmented balance sheet"
-    }
-
     replaced = False
-    for row in ws.iter_rows(min_row=1, max_row=min(ws.max_row, 30), min_col=1, max_col=min(ws.max_column, 20)):
-        for cell in row:
-            v = cell.value
-            if isinstance(v, str):
-                s = v.strip().lower()
-                # Direct exact match replacement for placeholders (e.g. "Manta Ray")
-                if s in target_placeholders:
-                    cell.value = deal_name
-                    replaced = True
-                # Also handle partial matches where the name is part of a longer string 
-                # e.g "Manta Ray segmented balance sheet" -> "DealName segmented balance sheet"
-                else:
-                    for ph in target_placeholders:
-                        if ph in s:
-                            # Use regex to do a case-insensitive replacement to preserve the rest of the string
-                            import re
-                            # Compile regex pattern to match the placeholder case-insensitively
-                            pattern = re.compile(re.escape(ph), re.IGNORECASE)
-                            new_val = pattern.sub(deal_name, v)
-                            if new_val != v:
-                                cell.value = new_val
-                                replaced = True
+    for cell in _existing_cells(ws, 30, 20):
+        v = cell.value
+        if isinstance(v, str):
+            s = v.strip().lower()
+            # Direct exact match replacement for placeholders (e.g. "Manta Ray")
+            if s in _TEMPLATE_PLACEHOLDERS:
+                cell.value = deal_name
+                replaced = True
+            # Also handle partial matches where the name is part of a longer string 
+            # e.g "Manta Ray segmented balance sheet" -> "DealName segmented balance sheet"
+            else:
+                for ph, pattern in _TEMPLATE_PLACEHOLDERS.items():
+                    if ph in s:
+                        # Case-insensitive replacement preserves the rest of the string
+                        new_val = pattern.sub(deal_name, v)
+                        if new_val != v:
+                            cell.value = new_val
+                            replaced = True
 
     if replaced:
         return
@@ -705,7 +738,7 @@ def _inject_default_assumptions(ws, data: Dict[str, Any]) -> None:
     if entry_row:
         for r in range(entry_row, min(entry_row + 5, ws.max_row)):
             for c in range(1, 10):
-                v = ws.cell(row=r, column=c).value
+                v = _cell_value(ws, r, c)
                 if isinstance(v, str) and "multiple" in v.lower():
                     target_cell = ws.cell(row=r+1, column=c)
                     # Override dummy values or empty cells with 5.0x
@@ -718,7 +751,7 @@ def _inject_default_assumptions(ws, data: Dict[str, Any]) -> None:
     if exit_row:
         for r in range(exit_row, min(exit_row + 5, ws.max_row)):
             for c in range(1, 10):
-                v = ws.cell(row=r, column=c).value
+                v = _cell_value(ws, r, c)
                 if isinstance(v, str) and "multiple" in v.lower():
                     target_cell = ws.cell(row=r+1, column=c)
                     if not getattr(target_cell, 'has_formula', False) and not str(target_cell.value).startswith('='):
@@ -736,7 +769,7 @@ def _inject_purchase_assumptions(ws, data: Dict[str, Any]) -> None:
         if entry_row:
             for r in range(entry_row, min(entry_row + 5, ws.max_row)):
                 for c in range(1, 10):
-                    v = ws.cell(row=r, column=c).value
+                    v = _cell_value(ws, r, c)
                     if isinstance(v, str) and "multiple" in v.lower():
                         target_cell = ws.cell(row=r+1, column=c)
                         if not getattr(target_cell, 'has_formula', False) and not str(target_cell.value).startswith('='):
@@ -749,7 +782,7 @@ def _inject_purchase_assumptions(ws, data: Dict[str, Any]) -> None:
         if exit_row:
             for r in range(exit_row, min(exit_row + 5, ws.max_row)):
                 for c in range(1, 10):
-                    v = ws.cell(row=r, column=c).value
+                    v = _cell_value(ws, r, c)
                     if isinstance(v, str) and "multiple" in v.lower():
                         target_cell = ws.cell(row=r+1, column=c)
                         if not getattr(target_cell, 'has_formula', False) and not str(target_cell.value).startswith('='):
@@ -791,8 +824,8 @@ def _inject_sources_uses(ws, data: Dict[str, Any], template_scale: float = 1.0)
     uses_header = _find_row_by_label(ws, ["Uses", "Total Uses"])
     if uses_header:
         for r in range(uses_header, min(uses_header + 10, ws.max_row)):
-            v = str(ws.cell(row=r, column=6).value or "").lower() # usually col F is label
-            h_cell_val = ws.cell(row=r, column=8).value
+            v = str(_cell_value(ws, r, 6) or "").lower() # usually col F is label
+            h_cell_val = _cell_value(ws, r, 8)
             if "purchase price" in v or "enterprise value" in v:
                 if purchase_price is not None:
                     # Write into column 8 (H)
@@ -840,7 +873,7 @@ def _inject_debt_profile(ws, data: Dict[str, Any], template_scale: float = 1.0)
         sources_header = _find_row_by_label(ws, ["Financing Inputs", "Sources"])
         if sources_header:
             for r in range(sources_header, min(sources_header + 10, ws.max_row)):
-                v = str(ws.cell(row=r, column=2).value or "").lower()
+                v = str(_cell_value(ws, r, 2) or "").lower()
                 if name_lower in v:
                     if bal is not None:
                         if not getattr(ws.cell(row=r, column=3), 'has_formula', False):
@@ -852,9 +885,9 @@ def _inject_debt_profile(ws, data: Dict[str, Any], template_scale: float = 1.0)
         int_header = _find_row_by_label(ws, ["Interest Inputs"])
         if int_header:
             for r in range(int_header, min(int_header + 10, ws.max_row)):
-                v11 = str(ws.cell(row=r, column=11).value or "").lower()
-                v25 = str(ws.cell(row=r, column=25).value or "").lower()
-                v26 = str(ws.cell(row=r, column=26).value or "").lower()
+                v11 = str(_cell_value(ws, r, 11) or "").lower()
+                v25 = str(_cell_value(ws, r, 25) or "").lower()
+                v26 = str(_cell_value(ws, r, 26) or "").lower()
                 if name_lower in v11 or name_lower in v25 or name_lower in v26:
                     if rate is not None:
                         rate_dec = float(rate) / 100.0 if float(rate) > 1.0 else float(rate)
@@ -866,9 +899,9 @@ def _inject_debt_profile(ws, data: Dict[str, Any], template_scale: float = 1.0)
         amor_header = _find_row_by_label(ws, ["Amortization Inputs"])
         if amor_header:
             for r in range(amor_header, min(amor_header + 7, ws.max_row)):
-                v11 = str(ws.cell(row=r, column=11).value or "").lower()
-                v25 = str(ws.cell(row=r, column=25).value or "").lower()
-                v26 = str(ws.cell(row=r, column=26).value or "").lower()
+                v11 = str(_cell_value(ws, r, 11) or "").lower()
+                v25 = str(_cell_value(ws, r, 25) or "").lower()
+                v26 = str(_cell_value(ws, r, 26) or "").lower()
                 if name_lower in v11 or name_lower in v25 or name_lower in v26:
                     if amort is not None:
                         ws.cell(row=r, column=27).value = float(amort)
@@ -902,10 +935,10 @@ def _clear_template_inputs(ws, year_blocks: List[Dict[str, Any]], row_map: Dict[
         # Skip clearing if this row is protected and contains a formula
         is_protected = r in protected_row_indices
         for c in cols:
-            cell = ws.cell(row=r, column=c)
-            v = cell.value
+            v = _cell_value(ws, r, c)
             if v is None:
                 continue
+            cell = ws.cell(row=r, column=c)
             # Overwrite formulas too — UNLESS it is a protected row
             if isinstance(v, str) and v.startswith("="):
                 if not is_protected:
@@ -927,24 +960,47 @@ def _clear_template_inputs(ws, year_blocks: List[Dict[str, Any]], row_map: Dict[
 
 def _erase_excel_errors(ws) -> None:
     """Sweep entire sheet and replace any formula-error cells with '-'."""
-    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            v = cell.value
-            if v is None:
+    # Only cells that exist can hold errors; walking the full grid would create the empty ones
+    for cell in list(_stored_cells(ws).values()):
+        v = cell.value
+        if v is None:
+            continue
+        if isinstance(v, str):
+            s = v.strip()
+            # Replace Excel error strings
+            if s in {"#DIV/0!", "#N/A", "#REF!", "#VALUE!", "#NAME?", "#NULL!", "#NUM!"}:
+                cell.value = "-"
                 continue
-            if isinstance(v, str):
-                s = v.strip()
-                # Replace Excel error strings
-                if s in {"#DIV/0!", "#N/A", "#REF!", "#VALUE!", "#NAME?", "#NULL!", "#NUM!"}:
-                    cell.value = "-"
-                    continue
-                # Replace hanging formulas that survived
-                if s.startswith("="):
-                    cell.value = "-"
-                    continue
-                # Replace #### (column-too-narrow marker stored as string)
-                if s.startswith("####"):
-                    cell.value = "-"
+            # Replace hanging formulas that survived
+            if s.startswith("="):
+                cell.value = "-"
+                continue
+            # Replace #### (column-too-narrow marker stored as string)
+            if s.startswith("####"):
+                cell.value = "-"
+
+
+def _stored_cells(ws) -> Dict[Tuple[int, int], Any]:
+    """
+    The worksheet's existing cells keyed by (row, column), without creating any.
+    Relies on openpyxl's private Worksheet._cells dict (layout unchanged through 3.1.x);
+    this is the only place that touches it, so re-check here when upgrading openpyxl.
+    """
+    return ws._cells
+
+
+def _cell_value(ws, row: int, column: int) -> Any:
+    """Read a cell without creating it (ws.cell() materializes, and later saves, every empty coordinate)."""
+    cell = _stored_cells(ws).get((row, column))
+    return None if cell is None else cell.value
+
+
+def _existing_cells(ws, max_row: int, max_col: int) -> List[Any]:
+    """Cells that exist within A1:(max_row, max_col), in row-major order, without filling the gaps."""
+    cells = _stored_cells(ws)
+    # Filter first so only the in-bounds coordinates get sorted
+    in_bounds = sorted(key for key in cells if key[0] <= max_row and key[1] <= max_col)
+    return [cells[key] for key in in_bounds]
 
 
 def _pick_target_sheets(wb) -> list:
@@ -954,25 +1010,23 @@ def _pick_target_sheets(wb) -> list:
 
 def _sheet_contains_text(ws, needle: str) -> bool:
     needle = needle.lower()
-    for row in ws.iter_rows(min_row=1, max_row=min(ws.max_row, 400), min_col=1, max_col=min(ws.max_column, 120)):
-        for cell in row:
-            v = cell.value
-            if isinstance(v, str) and needle in v.lower():
-                return True
+    for cell in _existing_cells(ws, 400, 120):
+        v = cell.value
+        if isinstance(v, str) and needle in v.lower():
+            return True
     return False
 
 
 def _detect_template_unit_scale(ws) -> float:
-    for row in ws.iter_rows(min_row=1, max_row=min(ws.max_row, 80), min_col=1, max_col=min(ws.max_column, 30)):
-        for cell in row:
-            v = cell.value
-            if not isinstance(v, str):
-                continue
-            s = v.lower().replace(" ", "")
-            if "inthousands" in s or "usdinthousands" in s or "$inthousands" in s or "$'000" in s or "$000s" in s:
-                return 1000.0
-            if "inmillions" in s or "usdinmillions" in s or "$inmillions" in s or "$'000,000" in s:
-                return 1_000_000.0
+    for cell in _existing_cells(ws, 80, 30):
+        v = cell.value
+        if not isinstance(v, str):
+            continue
+        s = v.lower().replace(" ", "")
+        if "inthousands" in s or "usdinthousands" in s or "$inthousands" in s or "$'000" in s or "$000s" in s:
+            return 1000.0
+        if "inmillions" in s or "usdinmillions" in s or "$inmillions" in s or "$'000,000" in s:
+            return 1_000_000.0
 
     dvs = getattr(ws, "data_validations", None)
     dv_list = getattr(dvs, "dataValidation", None) if dvs is not None else None
@@ -1016,7 +1070,7 @@ def _detect_year_columns(ws) -> Dict[int, int]:
     for r in range(1, min(ws.max_row, 120) + 1):
         found: Dict[int, int] = {}
         for c in range(1, min(ws.max_column, 60) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             year, _ = _parse_year_header(v)
             if year is None:
                 continue
@@ -1076,8 +1130,7 @@ def _detect_all_atar_blocks(ws) -> List[Dict[str, Any]]:
     atar_blocks = []
     for r in range(1, min(ws.max_row, 200) + 1):
         for c in range(1, min(ws.max_column, 200) + 1):
-            cell = ws.cell(row=r, column=c)
-            v = cell.value
+            v = _cell_value(ws, r, c)
             if isinstance(v, str) and v.strip().lower() == "atar projections":
                 start_col = c
                 end_col = c
@@ -1100,7 +1153,7 @@ def _detect_year_blocks_by_anchor(ws, label: str, role: str) -> List[Dict[str, A
     label_l = label.lower()
     for r in range(1, min(ws.max_row, 200) + 1):
         for c in range(1, min(ws.max_column, 200) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             if not isinstance(v, str):
                 continue
             if v.strip().lower() != label_l:
@@ -1120,7 +1173,7 @@ def _scan_year_row_and_split(ws, header_row: int, start_col: int, default_role:
 
     # 1. Collect all contiguous year-like cells
     for c in range(start_col, max_col + 1):
-        v = ws.cell(row=header_row, column=c).value
+        v = _cell_value(ws, header_row, c)
         year, suffix = _parse_year_header(v)
         
         if year is None:
@@ -1143,7 +1196,7 @@ def _scan_year_row_and_split(ws, header_row: int, start_col: int, default_role:
     prev_col: Optional[int] = None
 
     for c, year, suffix in cells:
-        raw = ws.cell(row=header_row, column=c).value
+        raw = _cell_value(ws, header_row, c)
         inferred = _infer_year_cell_role(raw, suffix)
         
         # If inferred is 'projection' but we are in a 'management' block, 
@@ -1190,7 +1243,7 @@ def _detect_year_blocks_generic(ws) -> List[Dict[str, Any]]:
     for r in range(1, min(ws.max_row, 200) + 1):
         matches: List[Tuple[int, int, str]] = []
         for c in range(1, min(ws.max_column, 200) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             year, suffix = _parse_year_header(v)
             if year is None:
                 continue
@@ -1206,7 +1259,7 @@ def _detect_year_blocks_generic(ws) -> List[Dict[str, Any]]:
         prev_col: Optional[int] = None
 
         for c, year, suffix in matches:
-            raw = ws.cell(row=r, column=c).value
+            raw = _cell_value(ws, r, c)
             role = _infer_year_cell_role(raw, suffix)
 
             if not current_cells:
@@ -1284,7 +1337,7 @@ def _build_year_block(ws, header_row: int, cells: List[Tuple[int, int, str]]) ->
 
     for c, _, suffix in cells:
         cols.append(c)
-        raw = ws.cell(row=header_row, column=c).value
+        raw = _cell_value(ws, header_row, c)
         raw_l = str(raw).lower() if raw is not None else ""
         
         # Simple heuristic based on suffix and content
@@ -1536,7 +1589,7 @@ def _find_row_by_label(ws, labels: Any, min_row: int = 1, max_row: Optional[int]
     
     for r in range(min_row, end + 1):
         for c in range(1, min(ws.max_column, 60) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             if isinstance(v, str):
                 s = v.strip().lower()
                 if s in normalized_labels:
@@ -1597,7 +1650,7 @@ def _find_second_percent_margin_row(ws, after_label: Any) -> Optional[int]:
     
     for r in range(start + 1, min(start + 8, ws.max_row) + 1):
         for c in range(1, min(ws.max_column, 20) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             if isinstance(v, str):
                 s = v.strip().lower()
                 if s in target_labels:
@@ -2180,15 +2233,9 @@ def _write_line(
         cell.value = v
         
         if template_scale is not None:
-            if template_scale >= 1_000_000.0:
-                fmt = '"$"#,##0.0"M";[Red]("$"#,##0.0"M")'
-            elif template_scale >= 1_000.0:
-                fmt = '"$"#,##0.0,"M";[Red]("$"#,##0.0,"M")'
-            else:
-                fmt = '"$"#,##0.0,,"M";[Red]("$"#,##0.0,,"M")'
-            cell.number_format = fmt
+            cell.number_format = _millions_format(template_scale)
         elif is_ebitda:
-            cell.number_format = '"$"#,##0.0;[Red]("$"#,##0.0)'
+            cell.number_format = EBITDA_NUMBER_FORMAT
 
 
 def _write_percent_line(
@@ -2229,7 +2276,7 @@ def _fuzzy_find_row_by_label(ws, target_name: str, min_row: int = 1, max_row: Op
 
     for r in range(min_row, end + 1):
         for c in range(1, min(ws.max_column, 20) + 1):
-            v = ws.cell(row=r, column=c).value
+            v = _cell_value(ws, r, c)
             if isinstance(v, str):
                 s = v.strip().lower()
                 if not s: continue
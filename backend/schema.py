@@ -190,6 +190,13 @@ def get_debt_profile_schema():
     }
 
 
+# Fields checked by validate_schema, built once at import
+_REQUIRED_FIELDS = ('company_name', 'currency', 'company_summary', 'revenue',
+                    'profit_metrics', 'market_intelligence', 'risk_analysis', 'ai_suggestion')
+_REVENUE_FIELDS = ('history', 'present', 'future')
+_RISK_FIELDS = ('operational_risks', 'financial_risks', 'market_risks', 'regulatory_risks')
+
+
 def validate_schema(data):
     """
     Validates that extracted data matches the expected schema structure.
@@ -201,13 +208,9 @@ def validate_schema(data):
         tuple: (is_valid, errors)
     """
     errors = []
-    schema = get_extraction_schema()
     
     # Check top-level required fields
-    required_fields = ['company_name', 'currency', 'company_summary', 'revenue', 
-                      'profit_metrics', 'market_intelligence', 'risk_analysis', 'ai_suggestion']
-    
-    for field in required_fields:
+    for field in _REQUIRED_FIELDS:
         if field not in data:
             errors.append(f"Missing required field: {field}")
     
@@ -216,7 +219,7 @@ def validate_schema(data):
         if not isinstance(data['revenue'], dict):
             errors.append("Revenue must be a dictionary")
         else:
-            for key in ['history', 'present', 'future']:
+            for key in _REVENUE_FIELDS:
                 if key not in data['revenue']:
                     errors.append(f"Revenue missing '{key}' field")
     
@@ -232,7 +235,7 @@ def validate_schema(data):
         if not isinstance(data['risk_analysis'], dict):
             errors.append("Risk analysis must be a dictionary")
         else:
-            for key in ['operational_risks', 'financial_risks', 'market_risks', 'regulatory_risks']:
+            for key in _RISK_FIELDS:
                 if key not in data['risk_analysis']:
                     errors.append(f"Risk analysis missing '{key}' field")
     
@@ -0,0 +1,134 @@
+"""
+SQLite persistence for deals and documents.
+Write-through backing store for the in-memory DEALS / DOCUMENTS maps in app.py.
+The database runs in WAL mode so API threads and pipeline threads (or several
+gunicorn workers) can read while an upload is being written. Each thread gets
+its own connection; only writers are serialized.
+"""
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+DB_PATH = os.environ.get(
+    'ATAR_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deals.db')
+)
+
+_DEAL_COLUMNS = ("id", "name", "value", "status", "date", "file_name")
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _conn() -> sqlite3.Connection:
+    """This thread's connection; WAL lets these read concurrently with a writer"""
+    c = getattr(_local, 'conn', None)
+    if c is None:
+        c = _local.conn = sqlite3.connect(DB_PATH)
+        c.execute('PRAGMA synchronous=NORMAL')
+    return c
+
+
+conn = _conn()
+conn.execute('PRAGMA journal_mode=WAL')
+conn.execute(
+    'CREATE TABLE IF NOT EXISTS deals('
+    'id TEXT PRIMARY KEY, name TEXT, value TEXT, status TEXT, date TEXT, file_name TEXT)'
+)
+conn.execute(
+    'CREATE TABLE IF NOT EXISTS documents('
+    'id TEXT PRIMARY KEY, deal_id TEXT NOT NULL, name TEXT, ocr_text_preview TEXT, data BLOB, '
+    'created_at REAL DEFAULT (julianday(\'now\')))'
+)
+conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_deal_id ON documents(deal_id)')
+conn.commit()
+
+
+# ============================================================================
+# DEALS
+# ============================================================================
+
+def save_deal(deal: Dict[str, Any]) -> None:
+    """Insert or replace a deal row"""
+    with _lock:
+        conn = _conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO deals(id, name, value, status, date, file_name) VALUES (?, ?, ?, ?, ?, ?)',
+            tuple(deal.get(col) for col in _DEAL_COLUMNS)
+        )
+        conn.commit()
+
+
+def update_deal_status(deal_id: str, status: str) -> None:
+    with _lock:
+        conn = _conn()
+        conn.execute('UPDATE deals SET status = ? WHERE id = ?', (status, deal_id))
+        conn.commit()
+
+
+def list_deals() -> List[Dict[str, Any]]:
+    rows = _conn().execute(
+        'SELECT id, name, value, status, date, file_name FROM deals ORDER BY rowid'
+    ).fetchall()
+    return [_deal_from_row(row) for row in rows]
+
+
+def _deal_from_row(row) -> Dict[str, Any]:
+    deal = dict(zip(_DEAL_COLUMNS, row))
+    # Deals created via POST /api/deals never had value/file_name keys
+    return {k: v for k, v in deal.items() if v is not None or k in ("id", "name", "status", "date")}
+
+
+# ============================================================================
+# DOCUMENTS
+# ============================================================================
+
+def save_document(doc: Dict[str, Any]) -> None:
+    """Insert or replace a document row; extracted_data is stored as an orjson blob"""
+    blob = orjson.dumps(doc.get("extracted_data"), option=orjson.OPT_NON_STR_KEYS)
+    with _lock:
+        conn = _conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO documents(id, deal_id, name, ocr_text_preview, data) VALUES (?, ?, ?, ?, ?)',
+            (doc["id"], doc["deal_id"], doc.get("name"), doc.get("ocr_text_preview"), blob)
+        )
+        conn.commit()
+
+
+def list_documents(deal_id: Optional[str] = None, with_data: bool = True) -> List[Dict[str, Any]]:
+    """
+    All documents (or one deal's documents, via the deal_id index) in insertion order.
+    With with_data=False the extracted_data blob is not read; fetch it later with load_document_data.
+    """
+    query = 'SELECT id, deal_id, name, ocr_text_preview, {} FROM documents'.format('data' if with_data else 'NULL')
+    params: tuple = ()
+    if deal_id is not None:
+        query += ' WHERE deal_id = ?'
+        params = (deal_id,)
+    query += ' ORDER BY rowid'
+
+    rows = _conn().execute(query, params).fetchall()
+
+    return [
+        {
+            "id": doc_id,
+            "deal_id": row_deal_id,
+            "name": name,
+            "extracted_data": orjson.loads(data) if data else None,
+            "ocr_text_preview": preview
+        }
+        for doc_id, row_deal_id, name, preview, data in rows
+    ]
+
+
+def load_document_data(doc_id: str) -> Optional[Dict[str, Any]]:
+    """extracted_data for one document, or None"""
+    row = _conn().execute('SELECT data FROM documents WHERE id = ?', (doc_id,)).fetchone()
+    return orjson.loads(row[0]) if row and row[0] else None
+
+
+def is_empty() -> bool:
+    return _conn().execute('SELECT 1 FROM deals LIMIT 1').fetchone() is None
@@ -0,0 +1,14 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -k gthread -w 1 --threads 16 -b 0.0.0.0:8000 backend.wsgi:app
+
+Pipeline tasks are held in per-process memory, so run a single worker;
+task polling must reach the worker that accepted the upload. The gthread
+worker serves requests on real OS threads, which keeps the CPU-heavy work
+(pypdf, openpyxl, normalization) in the pipeline / LLM / IO thread pools
+from stalling other requests, and keeps store.py's per-thread SQLite
+connections genuinely per thread. Do not use the gevent worker: its
+monkey-patching turns those pools into greenlets on one OS thread.
+"""
+from backend.app import app  # noqa: F401
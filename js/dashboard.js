@@ -883,7 +883,12 @@ document.addEventListener('DOMContentLoaded', () => {
                 const response = await fetch(`${API_URL}/reports/generate-excel/${dealId}`, {
                     method: 'POST'
                 });
-                const result = await response.json();
+                let result = await response.json();
+
+                if (result.success && result.taskId) {
+                    // Generation runs in the background; wait for the file
+                    result = await waitForTask(result.taskId, 1000);
+                }
 
                 if (result.success) {
                     // Trigger Download
@@ -1050,7 +1055,12 @@ document.addEventListener('DOMContentLoaded', () => {
                         throw new Error(`Upload failed: ${response.statusText}`);
                     }
 
-                    const result = await response.json();
+                    let result = await response.json();
+
+                    if (result.success && result.taskId) {
+                        statusText.textContent = `Uploaded ${file.name}. Running OCR and extraction...`;
+                        result = await waitForTask(result.taskId);
+                    }
 
                     if (result.success) {
                         statusText.textContent = 'Upload complete! OCR processing finished.';
@@ -1077,6 +1087,38 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         }
 
+        async function waitForTask(taskId, intervalMs = 2000, maxWaitMs = 15 * 60 * 1000) {
+            // Poll the background pipeline until it finishes or the deadline passes
+            const deadline = Date.now() + maxWaitMs;
+            while (Date.now() < deadline) {
+                const response = await fetch(`${API_URL}/tasks/${taskId}`);
+                if (!response.ok) {
+                    // 404 means the task is gone (e.g. server restart or eviction)
+                    let message = `Task status request failed (HTTP ${response.status})`;
+                    try {
+                        message = (await response.json()).message || message;
+                    } catch (e) {
+                        // Non-JSON error body; keep the status message
+                    }
+                    return { success: false, message };
+                }
+                const task = await response.json();
+
+                if (!task.success) {
+                    return task;
+                }
+                if (task.state === 'SUCCESS') {
+                    return { success: true, ...task.result };
+                }
+                if (task.state === 'FAILURE') {
+                    return { success: false, message: task.message };
+                }
+
+                await new Promise(resolve => setTimeout(resolve, intervalMs));
+            }
+            return { success: false, message: 'Timed out waiting for the task to finish' };
+        }
+
         if (viewName === 'active-deals') {
             loadActiveDeals();
         }
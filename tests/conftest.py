@@ -0,0 +1,39 @@
+"""
+Shared pytest setup. The SQLite store and LLM disk cache are pointed at a throwaway
+directory before any backend module is imported, so tests never touch backend/deals.db.
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).absolute().parent.parent
+FIXTURES_DIR = Path(__file__).absolute().parent / "fixtures"
+
+_TMP_DIR = tempfile.mkdtemp(prefix="atar-tests-")
+os.environ["ATAR_DB_PATH"] = os.path.join(_TMP_DIR, "deals.db")
+os.environ["LLM_DISK_CACHE"] = "0"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def load_fixture(name):
+    with open(FIXTURES_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def extracted_dir(tmp_path, monkeypatch):
+    """An empty EXTRACTED_DATA_DIR, with the load caches cleared around the test"""
+    from backend import extraction
+
+    monkeypatch.setattr(extraction, "EXTRACTED_DATA_DIR", tmp_path)
+    extraction._newest_extracted_file.cache_clear()
+    extraction._read_extracted_file.cache_clear()
+    yield tmp_path
+    extraction._newest_extracted_file.cache_clear()
+    extraction._read_extracted_file.cache_clear()
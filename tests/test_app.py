@@ -0,0 +1,155 @@
+import io
+import time
+
+import pytest
+
+from backend import app as A
+from backend import store
+
+from conftest import load_fixture
+
+
+@pytest.fixture
+def client():
+    return A.app.test_client()
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Upload pipeline with OCR and extraction replaced; writes go to tmp_path"""
+    calls = []
+
+    def fake_extract(ocr_text, deal_id=None, user_deal_value=None, **kwargs):
+        calls.append(deal_id)
+        return {"company_name": "Acme", "revenue": {"present": {"value": 120, "period": "FY2023"}}}
+
+    monkeypatch.setattr(A, "UPLOAD_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(A, "PARSED_TEXT_DIR", str(tmp_path))
+    monkeypatch.setattr(A, "extract_text_from_file", lambda path, mime_type: "Revenue FY2023 120")
+    monkeypatch.setattr(A, "extract_financial_data", fake_extract)
+    return calls
+
+
+def _upload(client, deal_name="Acme", deal_value="10M"):
+    return client.post(
+        "/api/documents/upload",
+        data={"dealName": deal_name, "dealValue": deal_value, "document": (io.BytesIO(b"%PDF-1.4 test"), "acme.pdf")},
+        content_type="multipart/form-data"
+    )
+
+
+def _wait(client, url, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(url).get_json()
+        if body["state"] in ("SUCCESS", "FAILURE"):
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"task at {url} did not finish")
+
+
+def test_unknown_task_is_404(client):
+    for url in ("/api/tasks/nope", "/api/reports/status/nope"):
+        response = client.get(url)
+        assert response.status_code == 404
+        assert response.get_json() == {"success": False, "message": "Task not found"}
+
+
+def test_upload_task_reports_success(client, pipeline):
+    response = _upload(client)
+    assert response.status_code == 202
+    body = response.get_json()
+    task_id, deal_id = body["taskId"], body["dealId"]
+
+    task = _wait(client, f"/api/tasks/{task_id}")
+    assert task["success"] is True
+    assert task["state"] == "SUCCESS"
+    assert task["dealId"] == deal_id
+    assert task["result"]["dealId"] == deal_id
+    assert task["result"]["data"]["company_name"] == "Acme"
+    assert pipeline == [deal_id]
+    assert A.DEALS[deal_id]["status"] == "Active"
+
+    # Report tasks share the table, so the alias sees the same task
+    assert client.get(f"/api/reports/status/{task_id}").get_json() == task
+
+
+def test_upload_task_reports_failure(client, pipeline, monkeypatch):
+    def failing_extract(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(A, "extract_financial_data", failing_extract)
+    body = _upload(client, deal_value="failure").get_json()
+
+    task = _wait(client, f"/api/tasks/{body['taskId']}")
+    assert task["state"] == "FAILURE"
+    assert task["message"] == "LLM unavailable"
+    assert task["result"] is None
+    assert A.DEALS[body["dealId"]]["status"] == "Failed"
+
+
+def test_finished_tasks_are_evicted_after_ttl(monkeypatch):
+    monkeypatch.setattr(A, "TASK_TTL_SECONDS", 60)
+    finished = A._new_task("d1")
+    running = A._new_task("d1")
+    A._update_task(finished, state="SUCCESS", result={})
+    A._update_task(running, state="STARTED")
+    A.TASKS[finished]["finished_at"] -= 120
+
+    A._new_task("d1")
+
+    assert finished not in A.TASKS
+    assert running in A.TASKS
+
+
+def test_startup_stub_is_materialized_from_store():
+    doc = {"id": "doc_stub_test", "deal_id": "deal_stub_test", "name": "stub.pdf",
+           "extracted_data": {"company_name": "Stub Co"}, "ocr_text_preview": ""}
+    store.save_document(doc)
+    stub = dict(doc, extracted_data=None)
+    A._UNLOADED_DOCS.add(stub["id"])
+
+    assert A._materialize(stub)["extracted_data"] == {"company_name": "Stub Co"}
+    assert stub["id"] not in A._UNLOADED_DOCS
+
+
+def test_analysis_matches_fixture(client, monkeypatch):
+    sample = load_fixture("analysis_input.json")
+    monkeypatch.setitem(A.DEALS, "fixture_deal", {"id": "fixture_deal", "value": "7M"})
+    monkeypatch.setitem(A.DOCS_BY_DEAL, "fixture_deal", [{"id": "fixture_doc", "deal_id": "fixture_deal", "extracted_data": sample}])
+    A._ANALYSIS_CACHE.pop("fixture_deal", None)
+
+    first = client.get("/api/analysis/fixture_deal").get_json()
+    # The second request is served from the encoded-payload cache
+    second = client.get("/api/analysis/fixture_deal").get_json()
+
+    assert first == load_fixture("analysis_expected.json")
+    assert second == first
+    A._ANALYSIS_CACHE.pop("fixture_deal", None)
+
+
+def test_document_listing_tolerates_concurrent_uploads(client, monkeypatch):
+    # A listing that hits the store mid-iteration must not see the maps change size
+    added = []
+
+    def add_during_load(doc_id):
+        if not added:
+            added.append(doc_id)
+            A._add_document({"id": "doc_race_new", "deal_id": "deal_race", "name": "new.pdf",
+                             "extracted_data": {}, "ocr_text_preview": ""})
+        return {"company_name": "Stub Co"}
+
+    monkeypatch.setattr(A.store, "load_document_data", add_during_load)
+    monkeypatch.setitem(A.DOCUMENTS, "doc_race_stub", {"id": "doc_race_stub", "deal_id": "deal_race",
+                                                       "name": "stub.pdf", "extracted_data": None})
+    monkeypatch.setitem(A.DOCS_BY_DEAL, "deal_race", [A.DOCUMENTS["doc_race_stub"]])
+    A._UNLOADED_DOCS.add("doc_race_stub")
+    A._LIST_GEN['documents'] += 1
+
+    for url in ("/api/documents", "/api/documents?dealId=deal_race"):
+        added.clear()
+        A._UNLOADED_DOCS.add("doc_race_stub")
+        response = client.get(url)
+        assert response.status_code == 200
+    A.DOCUMENTS.pop("doc_race_new", None)
+    A._LIST_GEN['documents'] += 1
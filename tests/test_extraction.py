@@ -0,0 +1,240 @@
+import copy
+
+import pytest
+
+from backend import extraction as E
+
+from conftest import load_fixture
+
+
+# ============================================================================
+# NUMBER PARSING
+# ============================================================================
+
+@pytest.mark.parametrize("value, expected", [
+    ("42", 42.0),
+    ("1,234", 1234.0),
+    ("(1,000)", -1000.0),
+    (" 7 ", 7.0),
+    ("007", 7.0),
+    # Not plain integers: these take the regex path
+    ("$1.5M", 1.5),
+    ("-12", -12.0),
+    ("3.25%", 3.25),
+    ("(2.5)", -2.5),
+    ("٣", None),
+    ("", None),
+    ("-", None),
+    ("n/a", None),
+    (None, None),
+    (5, 5.0),
+    (2.5, 2.5),
+])
+def test_parse_number(value, expected):
+    assert E._parse_number(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "42", "1,234", "(1,000)", "  900  ", "12,345,678"])
+def test_parse_number_fast_path_matches_regex_path(value):
+    s = str(value).strip()
+    neg = s.startswith("(") and s.endswith(")")
+    s = s.strip("()").replace(",", "")
+    expected = float(E._NON_NUMERIC_RE.sub("", s))
+    assert E._parse_number(value) == (-expected if neg else expected)
+
+
+# ============================================================================
+# SECTION SLICING AND GATES
+# ============================================================================
+
+def test_section_text_short_text_is_returned_whole():
+    text = "Capital expenditure FY2023 12"
+    assert E._section_text("capex", text) == text
+
+
+def test_section_text_unsliced_section_gets_full_text():
+    text = "x" * (E._SLICE_MAX_CHARS + 1)
+    assert E._section_text("free_cash_flow", text) == text
+
+
+def test_section_text_without_keywords_falls_back_to_full_text():
+    text = "filler " * E._SLICE_MAX_CHARS
+    assert E._section_text("capex", text) == text
+
+
+def test_section_text_keeps_context_around_keywords():
+    filler = "f" * (E._SLICE_MAX_CHARS // 2)
+    text = filler + "Capital expenditure table 2023 12" + filler + "capex 2024 15" + filler
+
+    sliced = E._section_text("capex", text)
+
+    parts = sliced.split("\n...\n")
+    assert len(parts) == 2
+    assert "Capital expenditure table 2023 12" in parts[0]
+    assert "capex 2024 15" in parts[1]
+    assert len(parts[0]) == E._SLICE_BEFORE + len("Capital expenditure") + E._SLICE_AFTER
+    assert sum(len(p) for p in parts) <= E._SLICE_MAX_CHARS
+
+
+def test_section_text_is_capped():
+    text = "capex 1 " * E._SLICE_MAX_CHARS
+    sliced = E._section_text("capex", text)
+    assert len(sliced) == E._SLICE_MAX_CHARS
+
+
+# A two-page teaser: generic financial words, but no balance sheet or debt schedule
+TEASER = (
+    "Project Falcon - confidential teaser. Revenue of $40m and EBITDA of $8m in FY2023. "
+    "Strong equity story, low leverage, with notes to management on debt-free growth and "
+    "minimal borrowing needs."
+)
+
+
+def _record_extractors(monkeypatch):
+    calls = []
+
+    def extractor(name):
+        def run(client, ocr_text, deal_id=None):
+            calls.append(name)
+            return {}
+        return run
+
+    monkeypatch.setattr(E, "LLM_COMBINED_SUBSECTIONS", False)
+    monkeypatch.setattr(E, "_SUBSECTION_EXTRACTORS", tuple(
+        (name, extractor(name)) for name, _ in E._SUBSECTION_EXTRACTORS
+    ))
+    return calls
+
+
+def test_teaser_skips_gated_sub_extractions(monkeypatch):
+    calls = _record_extractors(monkeypatch)
+    gated = ["balance_sheet", "debt_profile", "interest_schedule"]
+
+    futures = E._submit_subsections(None, TEASER, names=gated)
+
+    assert calls == []
+    assert {name: f.result() for name, f in futures.items()} == {name: {} for name in gated}
+
+
+@pytest.mark.parametrize("name, text", [
+    ("balance_sheet", "Consolidated balance sheet as of FY2023"),
+    ("balance_sheet", "Total assets 120"),
+    ("debt_profile", "A $50m term loan and a revolver"),
+    ("debt_profile", "Senior notes due 2028"),
+    ("interest_schedule", "Interest expense of $4m on the credit facility"),
+])
+def test_gated_sub_extraction_runs_when_terms_present(monkeypatch, name, text):
+    calls = _record_extractors(monkeypatch)
+
+    futures = E._submit_subsections(None, text, names=[name])
+    futures[name].result()
+
+    assert calls == [name]
+
+
+# ============================================================================
+# LOADING SAVED DATA
+# ============================================================================
+
+def _write(path, company):
+    path.write_text('{"company_name": "%s"}' % company, encoding="utf-8")
+
+
+def test_load_picks_highest_integer_suffix(extracted_dir):
+    _write(extracted_dir / "acme.json", "bare")
+    _write(extracted_dir / "acme_999999999.json", "seconds")
+    _write(extracted_dir / "acme_1700000000000000000.json", "nanoseconds")
+    _write(extracted_dir / "acme_ERROR_API_FAILURE_1800000000000000000.json", "error log")
+    _write(extracted_dir / "acme_latest.json", "non-numeric")
+    _write(extracted_dir / "other_1900000000000000000.json", "other deal")
+
+    # Lexically "acme_999999999" sorts after "acme_1700...", numerically it is older
+    assert E.load_extracted_data("acme")["company_name"] == "nanoseconds"
+
+
+def test_load_falls_back_to_bare_file(extracted_dir):
+    _write(extracted_dir / "acme.json", "bare")
+    assert E.load_extracted_data("acme")["company_name"] == "bare"
+    assert E.load_extracted_data("missing") is None
+
+
+def test_missing_deal_is_not_memoized(extracted_dir, monkeypatch):
+    # Even with every scan memoized, a "not found" must not outlive the save that follows it
+    monkeypatch.setattr(E, "_DIR_RACY_WINDOW_NS", 0)
+    assert E.load_extracted_data("acme") is None
+    _write(extracted_dir / "acme_1.json", "saved")
+    assert E.load_extracted_data("acme")["company_name"] == "saved"
+
+
+def test_save_in_same_tick_as_load_is_seen(extracted_dir):
+    _write(extracted_dir / "acme_1.json", "first")
+    assert E.load_extracted_data("acme")["company_name"] == "first"
+    _write(extracted_dir / "acme_2.json", "second")
+    assert E.load_extracted_data("acme")["company_name"] == "second"
+
+
+def test_loaded_data_is_normalized_and_stamped(extracted_dir):
+    _write(extracted_dir / "acme_1.json", "legacy")
+    data = E.load_extracted_data("acme")
+    assert data["_schema"] == E.CURRENT_SCHEMA
+    assert "free_cash_flow" in data
+
+
+# ============================================================================
+# NORMALIZATION FIXTURES
+# ============================================================================
+
+def test_normalization_matches_fixtures():
+    cases = load_fixture("normalization_cases.json")
+    expected = load_fixture("normalization_expected.json")
+
+    assert [E._normalize_extracted_data(copy.deepcopy(case)) for case in cases] == expected
+
+
+def test_normalize_extracted_data_stamps_schema_once():
+    cases = load_fixture("normalization_cases.json")
+    expected = load_fixture("normalization_expected.json")
+
+    for case, want in zip(cases, expected):
+        normalized = E.normalize_extracted_data(case)
+        assert normalized == dict(want, _schema=E.CURRENT_SCHEMA)
+        # Stamped data is returned as-is
+        assert E.normalize_extracted_data(normalized) is normalized
+
+
+# ============================================================================
+# LLM RESPONSE CACHE
+# ============================================================================
+
+class _FakeCompletions:
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = type("Message", (), {"content": self.contents.pop(0)})()
+        choice = type("Choice", (), {"message": message, "finish_reason": "stop"})()
+        return type("Response", (), {"choices": [choice]})()
+
+
+def _fake_client(contents):
+    completions = _FakeCompletions(contents)
+    chat = type("Chat", (), {"completions": completions})()
+    return type("Client", (), {"chat": chat})(), completions
+
+
+def test_malformed_llm_response_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(E, "LLM_DISK_CACHE", True)
+    monkeypatch.setattr(E, "_LLM_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(E, "_LLM_MEMO", type(E._LLM_MEMO)())
+    client, completions = _fake_client(['{"revenue": ', '{"revenue": 1}'])
+    messages = [{"role": "user", "content": "malformed-cache-test"}]
+
+    assert E._chat_completion(client, messages) == '{"revenue": '
+    assert list(tmp_path.iterdir()) == []
+    # The retry reaches the API again, and its valid reply is cached
+    assert E._chat_completion(client, messages) == '{"revenue": 1}'
+    assert E._chat_completion(client, messages) == '{"revenue": 1}'
+    assert completions.calls == 2
+    assert len(list(tmp_path.glob("*.json"))) == 1
@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import uuid
+
+from backend import store
+
+
+def _deal_id():
+    return f"deal_{uuid.uuid4().hex[:8]}"
+
+
+def test_schema_tables_and_index_exist():
+    conn = sqlite3.connect(store.DB_PATH)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+    assert {"deals", "documents"} <= tables
+    assert "idx_documents_deal_id" in indexes
+    assert journal_mode == "wal"
+
+
+def test_deal_round_trip_and_status_update():
+    deal_id = _deal_id()
+    store.save_deal({
+        "id": deal_id, "name": "Acme", "value": "10M", "status": "Processing",
+        "date": "2024-01-01", "file_name": "acme.pdf"
+    })
+    store.update_deal_status(deal_id, "Active")
+
+    deal = next(d for d in store.list_deals() if d["id"] == deal_id)
+    assert deal == {
+        "id": deal_id, "name": "Acme", "value": "10M", "status": "Active",
+        "date": "2024-01-01", "file_name": "acme.pdf"
+    }
+    assert not store.is_empty()
+
+
+def test_deal_without_optional_columns_hydrates_without_them():
+    deal_id = _deal_id()
+    store.save_deal({"id": deal_id, "name": "Bare", "status": "Active", "date": "2024-01-01"})
+
+    deal = next(d for d in store.list_deals() if d["id"] == deal_id)
+    assert deal == {"id": deal_id, "name": "Bare", "status": "Active", "date": "2024-01-01"}
+
+
+def test_documents_listed_as_stubs_then_loaded_on_demand():
+    deal_id = _deal_id()
+    data = {"company_name": "Acme", "revenue": {"history": [{"period": "FY2023", "value": 1}]}}
+    store.save_document({
+        "id": f"doc_{deal_id}", "deal_id": deal_id, "name": "acme.pdf",
+        "extracted_data": data, "ocr_text_preview": "preview"
+    })
+
+    full = store.list_documents(deal_id)
+    stubs = store.list_documents(deal_id, with_data=False)
+
+    assert [d["extracted_data"] for d in full] == [data]
+    assert stubs == [{
+        "id": f"doc_{deal_id}", "deal_id": deal_id, "name": "acme.pdf",
+        "extracted_data": None, "ocr_text_preview": "preview"
+    }]
+    assert store.load_document_data(f"doc_{deal_id}") == data
+    assert store.load_document_data("doc_missing") is None
+
+
+def test_each_thread_gets_its_own_connection():
+    deal_id = _deal_id()
+    seen = {}
+
+    def worker():
+        seen["conn"] = store._conn()
+        seen["again"] = store._conn()
+        store.save_deal({"id": deal_id, "name": "Threaded", "status": "Active", "date": "2024-01-01"})
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert seen["conn"] is seen["again"]
+    assert seen["conn"] is not store._conn()
+    # A write committed on the worker's connection is visible on this thread's
+    assert any(d["id"] == deal_id for d in store.list_deals())